@@ -0,0 +1,36 @@
+"""rate_limits table added
+
+Revision ID: 3f1a9c2d7b10
+Revises: c51c0abc3333
+Create Date: 2026-10-19 10:12:41.318520
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1a9c2d7b10'
+down_revision: Union[str, None] = 'c51c0abc3333'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rate_limits',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('allowed', sa.Boolean(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    # Buckets are disposable, so skip WAL for cheaper writes
+    op.execute('ALTER TABLE rate_limits SET UNLOGGED')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('rate_limits')
@@ -0,0 +1,43 @@
+"""task full-text search
+
+Revision ID: 5e0b7d3c9f21
+Revises: d27c5e9b4a86
+Create Date: 2026-10-19 13:20:05.842716
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0b7d3c9f21'
+down_revision: Union[str, None] = 'd27c5e9b4a86'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Title matches rank above details matches
+    op.execute("""
+        ALTER TABLE tasks ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(details, '')), 'B')
+        ) STORED
+    """)
+    op.execute('CREATE INDEX ix_tasks_search_vector ON tasks USING GIN (search_vector)')
+    op.execute('CREATE INDEX ix_tasks_title_trgm ON tasks USING GIN (title gin_trgm_ops)')
+    # Every task query filters by owner
+    op.create_index('ix_tasks_owner_id', 'tasks', ['owner_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_owner_id', table_name='tasks')
+    op.drop_index('ix_tasks_title_trgm', table_name='tasks')
+    op.drop_index('ix_tasks_search_vector', table_name='tasks')
+    op.drop_column('tasks', 'search_vector')
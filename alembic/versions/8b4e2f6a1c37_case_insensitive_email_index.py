@@ -0,0 +1,47 @@
+"""case-insensitive email index
+
+Revision ID: 8b4e2f6a1c37
+Revises: 3f1a9c2d7b10
+Create Date: 2026-10-19 11:02:17.604391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b4e2f6a1c37'
+down_revision: Union[str, None] = '3f1a9c2d7b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+MAX_LISTED = 20
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Never merges accounts itself: that deletes users and can't be undone
+    conflicts = op.get_bind().execute(sa.text(
+        "SELECT lower(trim(email)) FROM users GROUP BY 1 HAVING count(*) > 1 ORDER BY 1"
+    )).scalars().all()
+    if conflicts:
+        listed = ", ".join(conflicts[:MAX_LISTED])
+        more = f" and {len(conflicts) - MAX_LISTED} more" if len(conflicts) > MAX_LISTED else ""
+        raise RuntimeError(
+            f"{len(conflicts)} emails belong to more than one account: {listed}{more}. "
+            "Review and merge them with `python -m app.services.user_dedupe`, then upgrade again."
+        )
+
+    op.execute("UPDATE users SET email = lower(trim(email)) WHERE email <> lower(trim(email))")
+
+    op.drop_constraint('users_email_key', 'users', type_='unique')
+    op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_email_lower', table_name='users')
+    op.create_unique_constraint('users_email_key', 'users', ['email'])
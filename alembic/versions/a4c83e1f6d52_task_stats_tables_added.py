@@ -0,0 +1,52 @@
+"""task_stats tables added
+
+Revision ID: a4c83e1f6d52
+Revises: 5e0b7d3c9f21
+Create Date: 2026-10-19 14:05:17.402615
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c83e1f6d52'
+down_revision: Union[str, None] = '5e0b7d3c9f21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('task_stats',
+    sa.Column('owner_id', sa.String(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('owner_id')
+    )
+    op.create_table('task_daily_stats',
+    sa.Column('owner_id', sa.String(), nullable=False),
+    sa.Column('date', sa.String(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('owner_id', 'date')
+    )
+    # Backfill from existing tasks
+    op.execute(
+        "INSERT INTO task_daily_stats (owner_id, date, total, completed) "
+        "SELECT owner_id, date, count(*), count(*) FILTER (WHERE is_completed) "
+        "FROM tasks GROUP BY owner_id, date"
+    )
+    op.execute(
+        "INSERT INTO task_stats (owner_id, total, completed) "
+        "SELECT owner_id, sum(total), sum(completed) "
+        "FROM task_daily_stats GROUP BY owner_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('task_daily_stats')
+    op.drop_table('task_stats')
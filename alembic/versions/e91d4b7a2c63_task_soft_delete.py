@@ -0,0 +1,56 @@
+"""soft delete for tasks
+
+Revision ID: e91d4b7a2c63
+Revises: c3f5a8e2b6d4
+Create Date: 2026-10-19 17:31:56.208417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e91d4b7a2c63'
+down_revision: Union[str, None] = 'c3f5a8e2b6d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tasks', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+    # Live rows only, so soft-deleted ones don't bloat the read paths
+    op.drop_index('ix_tasks_owner_id', table_name='tasks')
+    op.create_index(
+        'ix_tasks_owner_live', 'tasks', ['owner_id', 'created_at'],
+        postgresql_where=sa.text('deleted_at IS NULL'),
+    )
+    op.create_index(
+        'ix_tasks_deleted_at', 'tasks', ['deleted_at'],
+        postgresql_where=sa.text('deleted_at IS NOT NULL'),
+    )
+    op.drop_index('ix_tasks_search_vector', table_name='tasks')
+    op.drop_index('ix_tasks_title_trgm', table_name='tasks')
+    op.execute(
+        'CREATE INDEX ix_tasks_search_vector ON tasks USING GIN (search_vector) '
+        'WHERE deleted_at IS NULL'
+    )
+    op.execute(
+        'CREATE INDEX ix_tasks_title_trgm ON tasks USING GIN (title gin_trgm_ops) '
+        'WHERE deleted_at IS NULL'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tasks_title_trgm', table_name='tasks')
+    op.drop_index('ix_tasks_search_vector', table_name='tasks')
+    op.execute('DELETE FROM tasks WHERE deleted_at IS NOT NULL')
+    op.execute('CREATE INDEX ix_tasks_search_vector ON tasks USING GIN (search_vector)')
+    op.execute('CREATE INDEX ix_tasks_title_trgm ON tasks USING GIN (title gin_trgm_ops)')
+    op.drop_index('ix_tasks_deleted_at', table_name='tasks')
+    op.drop_index('ix_tasks_owner_live', table_name='tasks')
+    op.create_index('ix_tasks_owner_id', 'tasks', ['owner_id'])
+    op.drop_column('tasks', 'deleted_at')
@@ -0,0 +1,169 @@
+import json
+import logging
+import os
+import socket
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Callable, Optional
+
+
+logger = logging.getLogger(__name__)
+
+MAX_MESSAGE_SIZE = 4096
+
+
+class TTLCache:
+    """Per-worker LRU cache whose entries expire after ttl seconds.
+
+    Sync handlers run in the threadpool, so access is locked.
+    """
+
+    def __init__(self, name: str, max_keys: int, ttl: float):
+        self.name = name
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any, ttl: Optional[float] = None):
+        expires = monotonic() + (self.ttl if ttl is None else min(ttl, self.ttl))
+        with self._lock:
+            self._entries[key] = (expires, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+
+    def discard(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Invalidation ------------------
+# Caches are shared-nothing: each worker fills its own. A change made on one
+# worker is announced to the others on the same host over Unix datagram
+# sockets, one per worker, in a directory the launcher (app.server) creates.
+
+
+class CacheChannel:
+    """Broadcasts invalidations to the other workers on this host.
+
+    Without a directory (a single uvicorn process) invalidations stay local,
+    and ttl bounds how stale another worker's copy can get.
+    """
+
+    def __init__(self):
+        self.directory: Optional[str] = None
+        self._socket: Optional[socket.socket] = None
+        self._sender: Optional[socket.socket] = None
+        self._path: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, directory: Optional[str]):
+        if not directory or self._socket is not None:
+            return
+        self.directory = directory
+        self._path = os.path.join(directory, f"{os.getpid()}.sock")
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._socket.bind(self._path)
+        # Sends never block a request on a slow receiver
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+        self._thread = threading.Thread(target=self._listen, args=(self._socket,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        sock, self._socket = self._socket, None
+        if sock is not None:
+            sock.close()
+            self._sender.close()
+            self._sender = None
+            try:
+                os.unlink(self._path)
+            except FileNotFoundError:
+                pass
+        self._thread = None
+
+    def publish(self, message: dict):
+        sender = self._sender
+        if sender is None:
+            return
+        data = json.dumps(message).encode()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if path == self._path or not name.endswith(".sock"):
+                continue
+            try:
+                sender.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Left behind by a worker that died; the arbiter forks a new one
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            except BlockingIOError:
+                logger.warning("Cache invalidation to %s dropped: receiver is behind", name)
+
+    def _listen(self, sock: socket.socket):
+        sock.settimeout(1.0)
+        while self._socket is sock:
+            try:
+                data = sock.recv(MAX_MESSAGE_SIZE)
+            except socket.timeout:
+                continue
+            except OSError:
+                return  # closed by stop()
+            try:
+                message = json.loads(data)
+                if "topic" in message:
+                    handler = topics.get(message["topic"])
+                    if handler is not None:
+                        handler(message["key"])
+                    continue
+                cache = caches.get(message["cache"])
+                if cache is not None:
+                    cache.discard(message["key"])
+            except (ValueError, KeyError) as e:
+                logger.warning("Bad cache invalidation message: %s", e)
+
+
+caches: dict[str, TTLCache] = {}
+# Other per-worker state kept in step the same way; handlers run on the listener thread
+topics: dict[str, Callable[[str], None]] = {}
+channel = CacheChannel()
+
+
+def register(name: str, max_keys: int, ttl: float) -> TTLCache:
+    cache = caches[name] = TTLCache(name, max_keys, ttl)
+    return cache
+
+
+def invalidate(name: str, key: str):
+    """Drops key here and on every other worker."""
+    caches[name].discard(key)
+    channel.publish({"cache": name, "key": key})
+
+
+def subscribe(topic: str, handler: Callable[[str], None]):
+    topics[topic] = handler
+
+
+def broadcast(topic: str, key: str):
+    """Calls topic's handler with key on every other worker."""
+    channel.publish({"topic": topic, "key": key})
@@ -1,8 +1,13 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
     database_url: str
+    database_replica_url: Optional[str] = None
+    read_your_writes_seconds: float = 5
+    prepare_threshold: int = 5
     secret_key: str
     algorithm: str
     access_token_expires_days: int
@@ -10,6 +15,85 @@ class Settings(BaseSettings):
     google_client_id: str
     google_client_secret: str
     google_redirect_uri: str
+    google_token_url: str = "https://oauth2.googleapis.com/token"
+    google_jwks_url: str = "https://www.googleapis.com/oauth2/v3/certs"
+    google_userinfo_url: str = "https://www.googleapis.com/oauth2/v2/userinfo"
+    task_events_broker: str = "local"  # "local" or "postgres"
+    compression_minimum_size: int = 1024
+    compression_gzip_level: int = 6
+    compression_brotli_quality: int = 4
+    static_max_age: int = 86400
+    query_inspector_enabled: bool = False
+    slow_query_ms: float = 200
+    query_explain: bool = True
+    n_plus_one_threshold: int = 5
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"  # "memory" or "database"
+    rate_limit_max_keys: int = 100_000
+    rate_limit_trust_forwarded_for: bool = False
+    rate_limits: dict[str, str] = {}
+    email_filter_enabled: bool = True
+    email_filter_capacity: int = 10_000_000
+    email_filter_error_rate: float = 0.01
+    email_filter_sync_seconds: float = 5
+    # Lets /is_email_available answer from a filter miss alone. Only safe when
+    # this is the one process registering users: other workers, containers or
+    # pods add emails this filter only sees at its next sync.
+    email_filter_authoritative: bool = False
+    avatar_bucket: str = "daytask-avatars"
+    avatar_public_base_url: Optional[str] = None
+    avatar_upload_expires: int = 900
+    avatar_max_bytes: int = 5 * 1024 * 1024
+    s3_endpoint_url: Optional[str] = None  # e.g. a local MinIO
+    s3_region: str = "us-east-1"
+    thumbnail_sizes: list[int] = [64, 256]
+    thumbnail_workers: int = 2
+    warmup_enabled: bool = True
+    warmup_pool_connections: int = 5
+    health_cache_seconds: float = 2
+    drain_delay_seconds: float = 5
+    drain_timeout_seconds: float = 25
+    jobs_enabled: bool = True
+    job_workers: int = 8
+    job_poll_seconds: float = 1
+    job_lease_seconds: float = 300
+    job_backoff_seconds: float = 2
+    job_backoff_max_seconds: float = 600
+    job_retention_hours: float = 168
+    face_match_bucket: Optional[str] = None  # defaults to avatar_bucket
+    archive_after_days: int = 30
+    archive_batch_size: int = 1000
+    archive_interval_seconds: float = 3600
+    purge_after_hours: float = 24
+    purge_batch_size: int = 1000
+    purge_batch_pause_seconds: float = 0.1
+    purge_interval_seconds: float = 600
+    purge_window: str = "02:00-05:00"  # UTC, HH:MM-HH:MM; empty means any time
+    idempotency_ttl_seconds: float = 86400
+    idempotency_max_keys: int = 10_000
+    idempotency_lock_seconds: float = 60
+    idempotency_database: bool = True  # share keys across workers
+    user_cache_seconds: float = 60
+    user_cache_max_keys: int = 10_000
+    token_cache_seconds: float = 3600
+    token_cache_max_keys: int = 10_000
+    search_index_seconds: float = 600  # in-process search fallback, per owner
+    search_index_max_owners: int = 1_000
+    cache_channel_dir: Optional[str] = None  # set by app.server for its workers
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_max_connections: int = 100  # this app's share of the server's max_connections
+    web_workers: int = 0  # 0 sizes from CPUs and db_max_connections
+    web_workers_per_cpu: float = 1
+    server_bind: str = "0.0.0.0:8000"
+    server_loop: str = "auto"  # "auto" uses uvloop when installed
+    server_http: str = "auto"  # "auto" uses httptools when installed
+    admin_emails: list[str] = []
+    profiler_enabled: bool = False
+    profiler_sample_rate: float = 0.01
+    profiler_interval_ms: float = 5
+    profiler_keep_per_route: int = 20
+    profiler_max_seconds: float = 30
 
     class Config:
         env_file = ".env"
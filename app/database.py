@@ -1,23 +1,96 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from .config import settings
+from .metrics import instrument_engine
+from .replica import read_your_writes, request_user_id
 
 SQLALCHEMY_DATABASE_URL = settings.database_url
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def engine_options(url: str) -> dict:
+    drivername = make_url(url).drivername
+    if not drivername.startswith("postgresql"):
+        return {}
+    # Per worker; app.server sizes the worker count so all pools fit in
+    # db_max_connections
+    options = {"pool_size": settings.db_pool_size, "max_overflow": settings.db_max_overflow}
+    # psycopg 3 prepares a statement server-side once it has run
+    # prepare_threshold times; psycopg2 can't, so it only gets SQLAlchemy's
+    # compiled cache
+    if drivername == "postgresql+psycopg":
+        options["connect_args"] = {"prepare_threshold": settings.prepare_threshold}
+    return options
+
 
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL
+    SQLALCHEMY_DATABASE_URL,
+    **engine_options(SQLALCHEMY_DATABASE_URL),
     # , connect_args={"sslmode": "require"}  # 🔐 Enable SSL
 )
 
+# Optional read replica; without one, reads go to the primary as before
+replica_engine = (
+    create_engine(
+        settings.database_replica_url, **engine_options(settings.database_replica_url)
+    )
+    if settings.database_replica_url
+    else engine
+)
+
+instrument_engine(engine)
+if replica_engine is not engine:
+    instrument_engine(replica_engine)
+
+if settings.query_inspector_enabled:
+    from .query_inspector import query_inspector
+
+    query_inspector.attach(engine)
+    if replica_engine is not engine:
+        query_inspector.attach(replica_engine)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
 
 Base = declarative_base()
 
 
-def get_db():
+@event.listens_for(SessionLocal, "after_commit")
+def mark_read_your_writes(session):
+    request = session.info.get("request")
+    if request is not None:
+        read_your_writes.mark(request_user_id(request))
+
+
+def get_db(request: Request):
     db = SessionLocal()
+    if replica_engine is not engine:
+        db.info["request"] = request
     try:
         yield db
     finally:
         db.close()
+
+
+# For read-only handlers: replica, unless this user wrote in the last few seconds.
+# Otherwise it hands back the request's primary session, which opens no
+# connection until used, so handlers without a replica still use one connection.
+# Writes are never read-only, so their reads (get_current_user) share the
+# handler's primary session instead of holding a replica connection as well.
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    if (
+        replica_engine is engine
+        or request.method not in SAFE_METHODS
+        or read_your_writes.is_sticky(request_user_id(request))
+    ):
+        yield db
+        return
+
+    replica_db = ReplicaSessionLocal()
+    try:
+        yield replica_db
+    finally:
+        replica_db.close()
@@ -0,0 +1,150 @@
+import json
+import logging
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.exceptions import RequestValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.responses import Response
+
+from app.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+# Bounds on what a client can make us echo back
+MAX_DETAIL_LENGTH = 300
+MAX_ERRORS = 10
+MAX_FIELD_LENGTH = 100
+
+# Default code for each status; raise AppError to pick a more specific one
+CODES = {
+    400: "bad_request",
+    401: "unauthorized",
+    403: "forbidden",
+    404: "not_found",
+    405: "method_not_allowed",
+    409: "conflict",
+    413: "payload_too_large",
+    415: "unsupported_media_type",
+    422: "validation_error",
+    429: "rate_limited",
+    500: "internal_error",
+    502: "upstream_error",
+    503: "unavailable",
+}
+
+
+class AppError(StarletteHTTPException):
+    """HTTPException with an explicit error code."""
+
+    def __init__(
+        self,
+        status_code: int,
+        detail: str,
+        code: Optional[str] = None,
+        headers: Optional[dict[str, str]] = None,
+    ):
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
+        self.code = code or CODES.get(status_code, "error")
+
+
+def truncate(text: str, limit: int = MAX_DETAIL_LENGTH) -> str:
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+def _dumps(content: dict) -> bytes:
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+# Envelopes ------------------
+# Nearly every error body is one of a few dozen fixed (status, code, detail)
+# triples, so each is encoded once and reused.
+
+
+@lru_cache(maxsize=512)
+def envelope(status_code: int, code: str, detail: str) -> bytes:
+    return _dumps({"success": False, "code": code, "detail": truncate(detail)})
+
+
+def error_response(
+    status_code: int,
+    detail: str,
+    code: Optional[str] = None,
+    headers: Optional[dict[str, str]] = None,
+) -> Response:
+    code = code or CODES.get(status_code, "error")
+    registry.errors.inc((status_code, code))
+    return Response(
+        envelope(status_code, code, detail),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json",
+    )
+
+
+# Precomputed: these are served while the database or the app is failing
+DATABASE_ERROR = envelope(500, "database_error", "Database error")
+INTERNAL_ERROR = envelope(500, "internal_error", "Internal server error")
+
+
+# Handlers ------------------
+
+
+async def http_exception_handler(request: Request, exc: StarletteHTTPException) -> Response:
+    code = getattr(exc, "code", None)
+    if isinstance(exc.detail, str):
+        return error_response(exc.status_code, exc.detail, code, exc.headers)
+    # Structured details are rare; encoded per response, not cached
+    code = code or CODES.get(exc.status_code, "error")
+    registry.errors.inc((exc.status_code, code))
+    return Response(
+        _dumps({"success": False, "code": code, "detail": exc.detail}),
+        status_code=exc.status_code,
+        headers=exc.headers,
+        media_type="application/json",
+    )
+
+
+def _field(loc: tuple) -> str:
+    return truncate(" → ".join(str(part) for part in loc), MAX_FIELD_LENGTH)
+
+
+async def validation_exception_handler(request: Request, exc: RequestValidationError) -> Response:
+    # The input is never echoed back and only the first few errors are
+    # listed, so a huge malformed body gets a small response
+    errors = exc.errors()
+    content = {
+        "success": False,
+        "code": "validation_error",
+        "errors": [
+            {"field": _field(error["loc"]), "message": truncate(error["msg"])}
+            for error in errors[:MAX_ERRORS]
+        ],
+    }
+    if len(errors) > MAX_ERRORS:
+        content["truncated"] = len(errors) - MAX_ERRORS
+    registry.errors.inc((422, "validation_error"))
+    return Response(_dumps(content), status_code=422, media_type="application/json")
+
+
+async def database_exception_handler(request: Request, exc: SQLAlchemyError) -> Response:
+    # The statement and driver message stay in the logs
+    logger.error("Database error on %s %s", request.method, request.url.path, exc_info=exc)
+    registry.errors.inc((500, "database_error"))
+    return Response(DATABASE_ERROR, status_code=500, media_type="application/json")
+
+
+async def unhandled_exception_handler(request: Request, exc: Exception) -> Response:
+    logger.error("Unhandled error on %s %s", request.method, request.url.path, exc_info=exc)
+    registry.errors.inc((500, "internal_error"))
+    return Response(INTERNAL_ERROR, status_code=500, media_type="application/json")
+
+
+def install(app: FastAPI):
+    app.add_exception_handler(StarletteHTTPException, http_exception_handler)
+    app.add_exception_handler(RequestValidationError, validation_exception_handler)
+    app.add_exception_handler(SQLAlchemyError, database_exception_handler)
+    app.add_exception_handler(Exception, unhandled_exception_handler)
@@ -0,0 +1,205 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from time import monotonic
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import models
+from app.config import settings
+from app.jobs import job_runner
+
+
+# Outcomes of IdempotencyStore.claim()
+NEW, REPLAY, BUSY, MISMATCH = "new", "replay", "busy", "mismatch"
+
+
+@dataclass
+class StoredResponse:
+    fingerprint: str
+    status_code: int
+    headers: list[tuple[str, str]]
+    body: bytes
+
+
+class MemoryCache:
+    """Finished responses for this worker, LRU-bounded and expiring after ttl.
+    Only touched from the event loop, so no locks."""
+
+    def __init__(self, max_keys: int, ttl: float):
+        self.max_keys = max_keys
+        self.ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, StoredResponse]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, response = entry
+        if expires < monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, key: str, response: StoredResponse):
+        self._entries[key] = (monotonic() + self.ttl, response)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_keys:
+            self._entries.popitem(last=False)
+
+
+class IdempotencyStore:
+    """Memory first, then the idempotency_keys table shared by all workers.
+
+    claim() reserves a key before the handler runs, so a duplicate that
+    arrives while the first request is still running gets BUSY instead of
+    running the handler twice.
+    """
+
+    def __init__(self, engine, max_keys: int, ttl: float, lock_seconds: float, use_database: bool):
+        self.engine = engine
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self.use_database = use_database
+        self.cache = MemoryCache(max_keys, ttl)
+        self._pending: set[str] = set()
+
+    async def claim(self, key: str, fingerprint: str) -> tuple[str, Optional[StoredResponse]]:
+        stored = self.cache.get(key)
+        if stored is not None:
+            return (REPLAY, stored) if stored.fingerprint == fingerprint else (MISMATCH, None)
+        if key in self._pending:
+            return BUSY, None
+
+        self._pending.add(key)
+        if not self.use_database:
+            return NEW, None
+        try:
+            outcome, stored = await run_in_threadpool(self._claim_row, key, fingerprint)
+        except BaseException:
+            self._pending.discard(key)
+            raise
+        if outcome != NEW:
+            self._pending.discard(key)
+        if stored is not None:
+            self.cache.put(key, stored)
+        return outcome, stored
+
+    async def complete(self, key: str, stored: StoredResponse):
+        self._pending.discard(key)
+        self.cache.put(key, stored)
+        if self.use_database:
+            await run_in_threadpool(self._complete_row, key, stored)
+
+    async def release(self, key: str):
+        # The response isn't worth replaying (5xx, 429, too large): let a retry run again
+        self._pending.discard(key)
+        if self.use_database:
+            await run_in_threadpool(self._delete_row, key)
+
+    def _claim_row(self, key: str, fingerprint: str):
+        table = models.IdempotencyKey.__table__
+        now = datetime.now(timezone.utc)
+        insert = pg_insert if self.engine.dialect.name == "postgresql" else sqlite_insert
+        with self.engine.begin() as connection:
+            inserted = connection.execute(
+                insert(table)
+                .values(
+                    key=key,
+                    fingerprint=fingerprint,
+                    created_at=now,
+                    expires_at=now + timedelta(seconds=self.ttl),
+                )
+                .on_conflict_do_nothing(index_elements=[table.c.key])
+                .returning(table.c.key)
+            ).first()
+            if inserted is not None:
+                return NEW, None
+
+            row = connection.execute(
+                select(table, (table.c.expires_at < now).label("expired")).where(
+                    table.c.key == key
+                )
+            ).first()
+            if row is None or row.expired:
+                # Expired but not purged yet: take it over
+                connection.execute(
+                    update(table)
+                    .where(table.c.key == key)
+                    .values(
+                        fingerprint=fingerprint,
+                        status_code=None,
+                        headers=None,
+                        body=None,
+                        created_at=now,
+                        expires_at=now + timedelta(seconds=self.ttl),
+                    )
+                )
+                return NEW, None
+            if row.fingerprint != fingerprint:
+                return MISMATCH, None
+            if row.status_code is not None:
+                headers = [tuple(header) for header in row.headers]
+                return REPLAY, StoredResponse(fingerprint, row.status_code, headers, row.body)
+
+            # Still running somewhere; a worker that died leaves a stale claim
+            taken = connection.execute(
+                update(table)
+                .where(
+                    table.c.key == key,
+                    table.c.status_code.is_(None),
+                    table.c.created_at < now - timedelta(seconds=self.lock_seconds),
+                )
+                .values(created_at=now)
+            ).rowcount
+            return (NEW, None) if taken else (BUSY, None)
+
+    def _complete_row(self, key: str, stored: StoredResponse):
+        table = models.IdempotencyKey.__table__
+        with self.engine.begin() as connection:
+            connection.execute(
+                update(table)
+                .where(table.c.key == key)
+                .values(
+                    status_code=stored.status_code,
+                    headers=[list(header) for header in stored.headers],
+                    body=stored.body,
+                )
+            )
+
+    def _delete_row(self, key: str):
+        table = models.IdempotencyKey.__table__
+        with self.engine.begin() as connection:
+            connection.execute(delete(table).where(table.c.key == key))
+
+    def purge_expired(self) -> int:
+        table = models.IdempotencyKey.__table__
+        with self.engine.begin() as connection:
+            return connection.execute(
+                delete(table).where(table.c.expires_at < datetime.now(timezone.utc))
+            ).rowcount
+
+
+def create_store() -> IdempotencyStore:
+    from app.database import engine
+
+    return IdempotencyStore(
+        engine,
+        max_keys=settings.idempotency_max_keys,
+        ttl=settings.idempotency_ttl_seconds,
+        lock_seconds=settings.idempotency_lock_seconds,
+        use_database=settings.idempotency_database,
+    )
+
+
+store = create_store()
+
+
+@job_runner.register("purge_idempotency_keys", max_attempts=1, concurrency=1, every=3600)
+def purge_idempotency_keys_job(payload: dict) -> dict:
+    return {"purged": store.purge_expired()}
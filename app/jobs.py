@@ -0,0 +1,386 @@
+import asyncio
+import logging
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, bindparam, delete, event, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+from app.metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+MAX_ERROR_LENGTH = 1000
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class JobType:
+    handler: Callable[[dict], Any]
+    max_attempts: int
+    concurrency: int
+    # Seconds between runs for scheduled jobs
+    every: Optional[float] = None
+
+
+# Enqueueing ------------------
+# Jobs are rows in the jobs table, written in the caller's transaction, so a
+# job exists exactly when the change that asked for it was committed.
+
+
+def enqueue(
+    db: Session,
+    name: str,
+    payload: dict,
+    *,
+    owner_id: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+    delay: float = 0,
+) -> models.Job:
+    """Adds a job; the caller commits. A repeated idempotency key returns the existing job."""
+    job_type = job_runner.types[name]
+    now = utcnow()
+    values = {
+        "id": uuid.uuid4(),
+        "name": name,
+        "payload": payload,
+        "owner_id": owner_id,
+        "idempotency_key": idempotency_key,
+        "status": QUEUED,
+        "attempts": 0,
+        "max_attempts": job_type.max_attempts,
+        "run_at": now + timedelta(seconds=delay),
+        "created_at": now,
+        "updated_at": now,
+    }
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = (
+        insert(models.Job)
+        .values(**values)
+        .on_conflict_do_nothing(index_elements=[models.Job.idempotency_key])
+        .returning(models.Job)
+    )
+    job = db.scalars(stmt).one_or_none()
+    if job is None:
+        job = db.scalars(
+            select(models.Job).where(models.Job.idempotency_key == idempotency_key)
+        ).one()
+    db.info["jobs_enqueued"] = True
+    return job
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def wake_runner(session):
+    if session.info.pop("jobs_enqueued", False):
+        job_runner.wake()
+
+
+# Runner ------------------
+
+
+class JobRunner:
+    """Claims due jobs from the table and runs them on this worker.
+
+    Several workers can run it against one database: claims use
+    FOR UPDATE SKIP LOCKED, and a claim is a lease that other workers take
+    over once it expires (e.g. the worker died mid-job).
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        poll_seconds: float,
+        lease_seconds: float,
+        backoff_seconds: float,
+        backoff_max_seconds: float,
+        retention_hours: float,
+    ):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.backoff_seconds = backoff_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.retention_hours = retention_hours
+        self.types: dict[str, JobType] = {}
+        self._running: dict[str, int] = {}
+        self._tasks: set[asyncio.Task] = set()
+        # Finished jobs waiting to be written in the next cycle
+        self._outcomes: list[dict] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._main: Optional[asyncio.Task] = None
+        self._last_purge = 0.0
+        # Last schedule slot enqueued per scheduled job type
+        self._scheduled: dict[str, int] = {}
+
+    def register(
+        self,
+        name: str,
+        max_attempts: int = 5,
+        concurrency: int = 4,
+        every: Optional[float] = None,
+    ):
+        def decorator(handler: Callable[[dict], Any]):
+            self.types[name] = JobType(handler, max_attempts, concurrency, every)
+            return handler
+
+        return decorator
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def wake(self):
+        # Called from request threads after commit
+        loop, wakeup = self._loop, self._wakeup
+        if loop is not None and wakeup is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wakeup.set)
+
+    async def startup(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._main = asyncio.create_task(self._run())
+
+    async def shutdown(self, timeout: float):
+        # Stop claiming, give running jobs a chance to finish; the rest are
+        # retried by another worker when their lease runs out
+        if self._main is not None:
+            self._main.cancel()
+            self._main = None
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=timeout)
+        if self._outcomes:
+            await run_in_threadpool(self.cycle, self._take_outcomes(), {}, 0)
+        self._loop = None
+
+    async def _run(self):
+        while True:
+            # Cleared first, so jobs finishing from here on trigger another cycle
+            self._wakeup.clear()
+            # One transaction per cycle records finished jobs and claims new ones
+            outcomes = self._take_outcomes()
+            wanted = self._free_slots()
+            free_workers = self.workers - self.in_flight
+            scheduled = self._due_schedules()
+            try:
+                claims = await run_in_threadpool(
+                    self.cycle, outcomes, wanted, free_workers, scheduled
+                )
+                self._scheduled.update(scheduled)
+            except Exception as e:
+                # Kept for the next cycle, ahead of anything that finished since
+                logger.warning("Could not record or claim jobs: %s", e)
+                self._outcomes[:0] = outcomes
+                claims = {}
+            if self._loop.time() - self._last_purge > 60:
+                self._last_purge = self._loop.time()
+                try:
+                    await run_in_threadpool(self.purge)
+                except Exception as e:
+                    logger.warning("Could not purge finished jobs: %s", e)
+
+            claimed = 0
+            for name, rows in claims.items():
+                for job_id, payload, attempts, max_attempts in rows:
+                    self._start(name, job_id, payload, attempts, max_attempts)
+                    claimed += 1
+
+            # Got all we asked for, so more may be waiting; otherwise sleep until woken
+            if claimed and claimed == min(sum(wanted.values()), free_workers):
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def _free_slots(self) -> dict[str, int]:
+        wanted = {}
+        for name, job_type in self.types.items():
+            free = job_type.concurrency - self._running.get(name, 0)
+            if free > 0:
+                wanted[name] = free
+        return wanted
+
+    def _due_schedules(self) -> dict[str, int]:
+        due = {}
+        now = utcnow().timestamp()
+        for name, job_type in self.types.items():
+            if job_type.every:
+                slot = int(now // job_type.every)
+                if self._scheduled.get(name) != slot:
+                    due[name] = slot
+        return due
+
+    def _take_outcomes(self) -> list[dict]:
+        outcomes, self._outcomes = self._outcomes, []
+        return outcomes
+
+    def cycle(
+        self,
+        outcomes: list[dict],
+        wanted: dict[str, int],
+        free_workers: int,
+        scheduled: Optional[dict[str, int]] = None,
+    ) -> dict[str, list]:
+        jobs = models.Job.__table__
+        now = utcnow()
+        claims = {}
+        with SessionLocal() as db:
+            succeeded = [o for o in outcomes if o["status"] == SUCCEEDED]
+            failed = [o for o in outcomes if o["status"] != SUCCEEDED]
+            # An outcome only lands on the attempt it belongs to: if the lease ran
+            # out and the job was claimed again, the late outcome is dropped
+            current = and_(
+                jobs.c.id == bindparam("job_id"),
+                jobs.c.status == RUNNING,
+                jobs.c.attempts == bindparam("attempt"),
+            )
+            if succeeded:
+                db.execute(
+                    update(jobs)
+                    .where(current)
+                    .values(status=SUCCEEDED, result=bindparam("result"), last_error=None,
+                            locked_until=None, updated_at=now),
+                    succeeded,
+                )
+            if failed:
+                db.execute(
+                    update(jobs)
+                    .where(current)
+                    .values(status=bindparam("status"), last_error=bindparam("last_error"),
+                            run_at=bindparam("retry_at"), locked_until=None, updated_at=now),
+                    failed,
+                )
+
+            # The slot in the key makes every worker enqueue the same job, so it runs once
+            for name, slot in (scheduled or {}).items():
+                enqueue(db, name, {}, idempotency_key=f"schedule:{name}:{slot}")
+
+            if wanted:
+                # Their last attempt never reported back (the worker died); not run again
+                expired = db.execute(
+                    update(jobs)
+                    .where(
+                        jobs.c.name.in_(list(wanted)),
+                        jobs.c.status == RUNNING,
+                        jobs.c.locked_until < now,
+                        jobs.c.attempts >= jobs.c.max_attempts,
+                    )
+                    .values(status=FAILED, last_error="Lease expired after the last attempt",
+                            locked_until=None, updated_at=now)
+                    .returning(jobs.c.name)
+                ).scalars().all()
+                for name in expired:
+                    registry.jobs.inc((name, FAILED))
+
+            for name, limit in wanted.items():
+                limit = min(limit, free_workers)
+                if limit <= 0:
+                    break
+                due = (
+                    select(jobs.c.id)
+                    .where(
+                        jobs.c.name == name,
+                        or_(
+                            and_(jobs.c.status == QUEUED, jobs.c.run_at <= now),
+                            and_(
+                                jobs.c.status == RUNNING,
+                                jobs.c.locked_until < now,
+                                jobs.c.attempts < jobs.c.max_attempts,
+                            ),
+                        ),
+                    )
+                    .order_by(jobs.c.run_at)
+                    .limit(limit)
+                    .with_for_update(skip_locked=True)
+                )
+                claims[name] = db.execute(
+                    update(jobs)
+                    .where(jobs.c.id.in_(due.scalar_subquery()))
+                    .values(
+                        status=RUNNING,
+                        attempts=jobs.c.attempts + 1,
+                        locked_until=now + timedelta(seconds=self.lease_seconds),
+                        updated_at=now,
+                    )
+                    .returning(jobs.c.id, jobs.c.payload, jobs.c.attempts, jobs.c.max_attempts)
+                ).all()
+                free_workers -= len(claims[name])
+            db.commit()
+        return claims
+
+    def _start(self, name, job_id, payload, attempts, max_attempts):
+        self._running[name] = self._running.get(name, 0) + 1
+        task = asyncio.create_task(self._execute(name, job_id, payload, attempts, max_attempts))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _execute(self, name, job_id, payload, attempts, max_attempts):
+        handler = self.types[name].handler
+        try:
+            if asyncio.iscoroutinefunction(handler):
+                result = await handler(payload)
+            else:
+                result = await run_in_threadpool(handler, payload)
+        except Exception as e:
+            logger.warning("Job %s %s attempt %d failed: %s", name, job_id, attempts, e)
+            retry = attempts < max_attempts
+            self._outcomes.append(
+                {
+                    "job_id": job_id,
+                    "attempt": attempts,
+                    "status": QUEUED if retry else FAILED,
+                    "last_error": repr(e)[:MAX_ERROR_LENGTH],
+                    # Failed for good: run_at is kept as the time of the last try
+                    "retry_at": utcnow() + timedelta(seconds=self.backoff(attempts) if retry else 0),
+                }
+            )
+            registry.jobs.inc((name, "retried" if retry else FAILED))
+        else:
+            self._outcomes.append(
+                {"job_id": job_id, "attempt": attempts, "status": SUCCEEDED, "result": result}
+            )
+            registry.jobs.inc((name, SUCCEEDED))
+        finally:
+            self._running[name] -= 1
+            self._wakeup.set()
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(self.backoff_max_seconds, self.backoff_seconds * 2 ** (attempts - 1))
+        # Jitter spreads out retries of jobs that failed together
+        return delay * random.uniform(0.5, 1)
+
+    def purge(self):
+        cutoff = utcnow() - timedelta(hours=self.retention_hours)
+        with SessionLocal() as db:
+            db.execute(
+                delete(models.Job).where(
+                    models.Job.status.in_((SUCCEEDED, FAILED)),
+                    models.Job.updated_at < cutoff,
+                )
+            )
+            db.commit()
+
+
+job_runner = JobRunner(
+    workers=settings.job_workers,
+    poll_seconds=settings.job_poll_seconds,
+    lease_seconds=settings.job_lease_seconds,
+    backoff_seconds=settings.job_backoff_seconds,
+    backoff_max_seconds=settings.job_backoff_max_seconds,
+    retention_hours=settings.job_retention_hours,
+)
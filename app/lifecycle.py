@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import signal
+from time import monotonic
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class Lifecycle:
+    """Readiness and drain state of this worker.
+
+    On SIGTERM the worker first reports not-ready for `drain_delay`
+    seconds so load balancers stop routing to it, then hands the signal to
+    the server, which stops accepting connections. Lifespan shutdown waits
+    for in-flight requests before closing pools.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.draining = False
+        self.stopping = False
+        self.in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._db_checked_at = 0.0
+        self._db_ok = False
+
+    # In-flight tracking, called by DrainMiddleware from the event loop
+    def request_started(self):
+        self.in_flight += 1
+        self._idle.clear()
+
+    def request_finished(self):
+        self.in_flight -= 1
+        if self.in_flight == 0:
+            self._idle.set()
+
+    async def wait_idle(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning("Shutting down with %d requests still running", self.in_flight)
+            return False
+
+    def install_drain_handler(self, delay: float):
+        loop = asyncio.get_running_loop()
+        previous = signal.getsignal(signal.SIGTERM)
+        if not callable(previous):
+            return
+
+        def handle_sigterm(signum, frame):
+            if self.draining:
+                return
+            logger.info("SIGTERM received, draining for %.1fs", delay)
+            self.draining = True
+            loop.call_soon_threadsafe(loop.call_later, delay, previous, signum, frame)
+
+        signal.signal(signal.SIGTERM, handle_sigterm)
+
+    # Health ------------------
+
+    async def database_ok(self) -> bool:
+        # Cached so frequent probes don't each take a pool connection
+        if monotonic() - self._db_checked_at < settings.health_cache_seconds:
+            return self._db_ok
+        try:
+            await run_in_threadpool(ping_database)
+            self._db_ok = True
+        except Exception as e:
+            logger.warning("Database health check failed: %s", e)
+            self._db_ok = False
+        self._db_checked_at = monotonic()
+        return self._db_ok
+
+
+def ping_database():
+    from app.database import engine
+
+    with engine.connect() as connection:
+        connection.exec_driver_sql("SELECT 1")
+
+
+lifecycle = Lifecycle()
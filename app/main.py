@@ -1,12 +1,69 @@
-from fastapi import FastAPI, Request, status
-from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
-from app.routers import auth, face_match, task, user # Ensure proper import paths
+from app import cache, errors
+from app.config import settings
+from app.database import engine, replica_engine
+from app.idempotency import store as idempotency_store
+from app.jobs import job_runner
+from app.lifecycle import lifecycle
+from app.metrics import registry
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.drain import DrainMiddleware
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiler import ProfilerMiddleware
+from app.middleware.query_inspector import QueryInspectorMiddleware
+from app.query_inspector import query_inspector
+from app.services.email_filter import email_filter
+from app.services.google_oauth import google_oauth
+from app.services.storage import thumbnail_pool
+from app.services.task_events import hub
+from app.services import task_purge  # noqa: F401  registers the purge job
+from app.static_files import PrecompressedStaticFiles
+from app.warmup import warm_up
+from app.routers import auth, face_match, health, jobs, profiles, realtime, task, user # Ensure proper import paths
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    cache.channel.start(settings.cache_channel_dir)
+    await google_oauth.startup()
+    if settings.email_filter_enabled:
+        await email_filter.startup()
+    if settings.warmup_enabled:
+        await run_in_threadpool(warm_up)
+    if settings.jobs_enabled:
+        await job_runner.startup()
+    lifecycle.install_drain_handler(settings.drain_delay_seconds)
+    lifecycle.ready = True
+    yield
+    # The server has stopped accepting connections; let running requests finish
+    lifecycle.ready = False
+    lifecycle.stopping = True
+    await lifecycle.wait_idle(settings.drain_timeout_seconds)
+    await job_runner.shutdown(settings.drain_timeout_seconds)
+    await email_filter.shutdown()
+    await google_oauth.shutdown()
+    thumbnail_pool.shutdown()
+    hub.close()
+    cache.channel.stop()
+    engine.dispose()
+    replica_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
 
-app = FastAPI()
+# Innermost, so replays still get CORS headers and compression
+app.add_middleware(
+    IdempotencyMiddleware,
+    routes={("POST", "/tasks/"), ("POST", "/register"), ("POST", "/send_otp")},
+    store=idempotency_store,
+)
 
 # CORS Middleware
 app.add_middleware(
@@ -17,21 +74,38 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Serve static files correctly
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Compress JSON responses above the size threshold
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
+)
+
+# Statement counts per endpoint, for development and regression tests
+if settings.query_inspector_enabled:
+    app.add_middleware(QueryInspectorMiddleware)
 
+# Sampled handler profiles, served to admins under /debug/profiles
+if settings.profiler_enabled:
+    app.add_middleware(ProfilerMiddleware, sample_rate=settings.profiler_sample_rate)
 
-# Custom error handler
-@app.exception_handler(RequestValidationError)
-async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    errors = []
-    for error in exc.errors():
-        field_path = " → ".join(str(loc) for loc in error["loc"])
-        errors.append({"field": field_path, "message": error["msg"]})
-    return JSONResponse(
-        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-        content={"success": False, "errors": errors},
-    )
+# Tracks in-flight requests for graceful shutdown
+app.add_middleware(DrainMiddleware)
+
+# Added last so it is outermost and times the whole stack
+app.add_middleware(MetricsMiddleware)
+
+# Serve static files, preferring .br/.gz variants built by `python -m app.static_files`
+app.mount(
+    "/static",
+    PrecompressedStaticFiles(directory="static", max_age=settings.static_max_age),
+    name="static",
+)
+
+
+# Error responses: {"success": false, "code": ..., "detail": ...}
+errors.install(app)
 
 
 # Routers
@@ -39,8 +113,25 @@ app.include_router(auth.router)
 app.include_router(user.router)
 app.include_router(task.router)
 app.include_router(face_match.router)
+app.include_router(realtime.router)
+app.include_router(jobs.router)
+app.include_router(health.router)
+if settings.profiler_enabled:
+    app.include_router(profiles.router)
 
 
 @app.get("/")
 def root():
     return {"message": "This is a Day Task project"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+if settings.query_inspector_enabled:
+
+    @app.get("/debug/queries", include_in_schema=False)
+    async def query_report():
+        return query_inspector.endpoint_report()
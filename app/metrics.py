@@ -0,0 +1,176 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+
+from sqlalchemy import event
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class RequestStats:
+    __slots__ = ("db_time", "db_queries")
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.db_queries = 0
+
+
+# Set by MetricsMiddleware; copied into the threadpool that runs sync handlers
+current_request: ContextVar[RequestStats | None] = ContextVar(
+    "current_request", default=None
+)
+
+
+def format_labels(names: tuple[str, ...], values: tuple) -> str:
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return ",".join(pairs)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.series: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple, amount: float = 1):
+        self.series[labels] = self.series.get(labels, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in self.series.items():
+            lines.append(f"{self.name}{{{format_labels(self.label_names, labels)}}} {value}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {self.value}",
+        ]
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: tuple[str, ...],
+        buckets: tuple[float, ...],
+    ):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.buckets = buckets
+        # labels -> [bucket counts..., overflow count, sum, count]
+        self.series: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in self.series.items():
+            label_str = format_labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{label_str},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{label_str},le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{label_str}}} {series[-2]}")
+            lines.append(f"{self.name}_count{{{label_str}}} {series[-1]}")
+        return lines
+
+
+class Registry:
+    """Per-process request metrics, updated only from the event loop thread."""
+
+    def __init__(self):
+        self.in_flight = Gauge("daytask_requests_in_flight", "Requests being served")
+        self.requests = Counter(
+            "daytask_requests_total",
+            "Responses by route and status",
+            ("method", "route", "status"),
+        )
+        self.latency = Histogram(
+            "daytask_request_duration_seconds",
+            "Request latency",
+            ("method", "route"),
+            LATENCY_BUCKETS,
+        )
+        self.db_time = Histogram(
+            "daytask_request_db_seconds",
+            "Time spent in database queries per request",
+            ("method", "route"),
+            DB_BUCKETS,
+        )
+        self.db_queries = Counter(
+            "daytask_db_queries_total",
+            "Database statements executed",
+            ("method", "route"),
+        )
+        self.jobs = Counter(
+            "daytask_jobs_total",
+            "Background job attempts by outcome",
+            ("name", "outcome"),
+        )
+        self.errors = Counter(
+            "daytask_errors_total",
+            "Error responses by status and error code",
+            ("status", "code"),
+        )
+
+    def record(self, method: str, route: str, status: int, elapsed: float, stats: RequestStats):
+        labels = (method, route)
+        self.requests.inc((method, route, status))
+        self.latency.observe(labels, elapsed)
+        if stats.db_queries:
+            self.db_time.observe(labels, stats.db_time)
+            self.db_queries.inc(labels, stats.db_queries)
+
+    def render(self) -> str:
+        lines = []
+        for metric in (
+            self.in_flight,
+            self.requests,
+            self.latency,
+            self.db_time,
+            self.db_queries,
+            self.jobs,
+            self.errors,
+        ):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def instrument_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started = perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_request.get()
+        if stats is not None:
+            stats.db_time += perf_counter() - context._query_started
+            stats.db_queries += 1
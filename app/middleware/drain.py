@@ -0,0 +1,35 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.errors import error_response
+from app.lifecycle import lifecycle
+
+
+HEALTH_PATHS = ("/healthz", "/readyz")
+
+
+class DrainMiddleware:
+    """Counts in-flight requests and turns new work away once shutdown has begun."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in HEALTH_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        if lifecycle.stopping:
+            response = error_response(
+                503,
+                "Server is shutting down",
+                code="shutting_down",
+                headers={"Retry-After": "1", "Connection": "close"},
+            )
+            await response(scope, receive, send)
+            return
+
+        lifecycle.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            lifecycle.request_finished()
@@ -0,0 +1,142 @@
+import hashlib
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.errors import error_response
+from app.idempotency import BUSY, MISMATCH, REPLAY, IdempotencyStore, StoredResponse
+
+
+MAX_KEY_LENGTH = 255
+MAX_STORED_BODY = 1024 * 1024
+# Per-request or per-connection headers that must not be replayed
+SKIP_HEADERS = {"date", "server", "connection", "set-cookie"}
+
+
+def _hash(*parts: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class IdempotencyMiddleware:
+    """Honours Idempotency-Key on the given (method, path) routes.
+
+    The first request with a key runs and its response is stored; repeats
+    with the same key and body get that response back without running the
+    handler. Keys are scoped to the caller's Authorization header, so two
+    users can't read each other's responses.
+    """
+
+    def __init__(self, app: ASGIApp, routes: set[tuple[str, str]], store: IdempotencyStore):
+        self.app = app
+        self.routes = routes
+        self.store = store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in self.routes:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        idempotency_key = headers.get("idempotency-key")
+        if idempotency_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            response = error_response(
+                400,
+                f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters",
+                code="invalid_idempotency_key",
+            )
+            await response(scope, receive, send)
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        key = _hash(
+            scope["method"].encode(),
+            scope["path"].encode(),
+            headers.get("authorization", "").encode(),
+            idempotency_key.encode(),
+        )
+        fingerprint = _hash(body)
+        outcome, stored = await self.store.claim(key, fingerprint)
+
+        if outcome == REPLAY:
+            await self.replay(stored, send)
+            return
+        if outcome == BUSY:
+            response = error_response(
+                409,
+                "A request with this Idempotency-Key is still in progress",
+                code="idempotency_key_in_use",
+                headers={"Retry-After": "1"},
+            )
+            await response(scope, receive, send)
+            return
+        if outcome == MISMATCH:
+            response = error_response(
+                422,
+                "Idempotency-Key was already used with a different request",
+                code="idempotency_key_reused",
+            )
+            await response(scope, receive, send)
+            return
+
+        body_sent = False
+
+        async def replay_body() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        start: dict = {}
+        chunks: list[bytes] = []
+        size = 0
+
+        async def capture(message: Message):
+            nonlocal size
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+                if size <= MAX_STORED_BODY:
+                    chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_body, capture)
+        except BaseException:
+            await self.store.release(key)
+            raise
+
+        status_code = start.get("status", 500)
+        # Server errors and rate limits are worth retrying for real
+        if status_code >= 500 or status_code == 429 or size > MAX_STORED_BODY:
+            await self.store.release(key)
+            return
+        response_headers = [
+            (name.decode("latin-1"), value.decode("latin-1"))
+            for name, value in start.get("headers", [])
+            if name.decode("latin-1").lower() not in SKIP_HEADERS
+        ]
+        await self.store.complete(
+            key, StoredResponse(fingerprint, status_code, response_headers, b"".join(chunks))
+        )
+
+    async def replay(self, stored: StoredResponse, send: Send):
+        headers = [
+            (name.encode("latin-1"), value.encode("latin-1")) for name, value in stored.headers
+        ]
+        headers.append((b"idempotent-replayed", b"true"))
+        await send({"type": "http.response.start", "status": stored.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": stored.body})
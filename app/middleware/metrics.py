@@ -0,0 +1,40 @@
+from time import perf_counter
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.metrics import RequestStats, current_request, registry
+
+
+class MetricsMiddleware:
+    """Records latency, status and DB time per route template into app.metrics.registry."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        registry.in_flight.value += 1
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - started
+            registry.in_flight.value -= 1
+            current_request.reset(token)
+            # Route templates keep label cardinality bounded
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            registry.record(scope["method"], path, status_code, elapsed, stats)
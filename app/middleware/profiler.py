@@ -0,0 +1,66 @@
+import random
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app import oauth2
+from app.database import SessionLocal
+from app.profiler import profiler
+
+
+def is_admin_token(token: str) -> bool:
+    db = SessionLocal()
+    try:
+        return oauth2.is_admin(oauth2.get_current_user(token=token, db=db))
+    except HTTPException:
+        return False
+    finally:
+        db.close()
+
+
+class ProfilerMiddleware:
+    """Profiles sampled requests, and admin requests sent with `X-Profile: 1`.
+
+    Profiled responses carry X-Profile-Id, the id to look up under
+    /debug/profiles.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not (
+            random.random() < self.sample_rate or await self.requested(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiler.start(scope["method"], scope["path"], scope)
+        status = None
+
+        async def send_with_id(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", str(profile.id).encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profiler.finish(profile, status)
+
+    async def requested(self, scope: Scope) -> bool:
+        headers = Headers(scope=scope)
+        if headers.get("x-profile") != "1":
+            return False
+        authorization = headers.get("authorization", "")
+        if not authorization.lower().startswith("bearer "):
+            return False
+        return await run_in_threadpool(is_admin_token, authorization[7:])
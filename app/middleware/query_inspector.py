@@ -0,0 +1,25 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.query_inspector import QueryCapture, current_capture, query_inspector
+
+
+class QueryInspectorMiddleware:
+    """Collects the statements of each request and reports them per endpoint."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        capture = QueryCapture()
+        token = current_capture.set(capture)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_capture.reset(token)
+            route = scope.get("route")
+            endpoint = f"{scope['method']} {getattr(route, 'path', 'unmatched')}"
+            query_inspector.record_request(endpoint, capture)
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import ARRAY, UUID, Column, Integer, String, DateTime, text, Boolean
+from sqlalchemy import ARRAY, JSON, UUID, Column, Float, Index, Integer, LargeBinary, String, DateTime, func, Boolean
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -16,19 +16,24 @@ class User(Base):
         index=True,
     )
 
-    email = Column(String, nullable=False, unique=True)
+    # Stored lowercased; uniqueness and lookups go through lower(email)
+    email = Column(String, nullable=False)
     password = Column(String, nullable=True)
     name = Column(String, nullable=False)
 
     profile_img = Column(String, nullable=True)
-    user_type = Column(String, nullable=True, server_default="email", default=[])
+    # {"64": url, "256": url}, filled in by the thumbnail workers
+    profile_thumbnails = Column(JSON, nullable=True)
+    user_type = Column(String, nullable=True, server_default="email", default="email")
 
     created_at = Column(
         DateTime(timezone=True),
         nullable=False,
-        server_default=text("now()"),
+        server_default=func.now(),
     )
 
+    __table_args__ = (Index("ix_users_email_lower", func.lower(email), unique=True),)
+
 
 class Task(Base):
     __tablename__ = "tasks"
@@ -43,12 +48,123 @@ class Task(Base):
     owner_id = Column(String, nullable=False)
     title = Column(String, nullable=False)
     details = Column(String, nullable=False)
-    team_members = Column(ARRAY(String), nullable=True)
+    # JSON variant lets benchmarks and tests run against SQLite
+    team_members = Column(ARRAY(String).with_variant(JSON, "sqlite"), nullable=True)
     time = Column(String, nullable=False)
     date = Column(String, nullable=False)
     is_completed = Column(Boolean, nullable=True, default=False)
+    # Postgres also has a generated search_vector column, managed by migrations only
     created_at = Column(
         DateTime(timezone=True),
         nullable=False,
-        server_default=text("now()"),
+        server_default=func.now(),
+    )
+    # Soft delete; rows are hard-deleted later by services/task_purge
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # Every read filters by owner and skips deleted rows
+        Index(
+            "ix_tasks_owner_live",
+            owner_id,
+            created_at,
+            postgresql_where=deleted_at.is_(None),
+        ),
+        # For the archival job; completed tasks are a small share of the hot table
+        Index("ix_tasks_completed_created", created_at, postgresql_where=is_completed),
+        Index(
+            "ix_tasks_deleted_at",
+            deleted_at,
+            postgresql_where=deleted_at.isnot(None),
+        ),
+    )
+
+
+# Completed tasks moved out of the hot table by services/task_archive.
+# Same columns as tasks, read only when a request asks for archived tasks.
+class ArchivedTask(Base):
+    __tablename__ = "archived_tasks"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    owner_id = Column(String, nullable=False)
+    title = Column(String, nullable=False)
+    details = Column(String, nullable=False)
+    team_members = Column(ARRAY(String).with_variant(JSON, "sqlite"), nullable=True)
+    time = Column(String, nullable=False)
+    date = Column(String, nullable=False)
+    is_completed = Column(Boolean, nullable=True, default=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
+
+    __table_args__ = (Index("ix_archived_tasks_owner_created", owner_id, created_at),)
+
+
+# Counters kept in step with tasks by the task router (see services/task_stats)
+class TaskStat(Base):
+    __tablename__ = "task_stats"
+
+    owner_id = Column(String, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+
+
+class TaskDailyStat(Base):
+    __tablename__ = "task_daily_stats"
+
+    owner_id = Column(String, primary_key=True)
+    date = Column(String, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    completed = Column(Integer, nullable=False, default=0)
+
+
+# Durable queue for app/jobs.py
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    name = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    owner_id = Column(String, nullable=True)
+    idempotency_key = Column(String, nullable=True, unique=True)
+    status = Column(String, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime(timezone=True), nullable=False)
+    locked_until = Column(DateTime(timezone=True), nullable=True)
+    result = Column(JSON, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (Index("ix_jobs_due", name, status, run_at),)
+
+
+# Stored responses for Idempotency-Key replays (app/idempotency.py).
+# status_code is null while the first request is still running.
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)
+    fingerprint = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=True)
+    headers = Column(JSON, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class RateLimit(Base):
+    __tablename__ = "rate_limits"
+
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    allowed = Column(Boolean, nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
     )
@@ -1,11 +1,12 @@
 from datetime import datetime, timedelta
+from time import time
 from uuid import UUID
 from fastapi import Depends, HTTPException, status
 from jose import jwt, JWTError
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-from app import models, schemas
-from app.database import get_db
+from app import cache, models, queries, schemas
+from app.database import SessionLocal, engine, get_read_db
 from .config import settings
 
 
@@ -16,6 +17,13 @@ SECRET_KEY = settings.secret_key
 ALGORITHM = settings.algorithm
 ACCESS_TOKEN_EXPIRE_DAYS = settings.access_token_expires_days
 
+# Per-worker caches for the lookups every authenticated request makes.
+# Tokens never change, so they are cached until they expire; users are
+# invalidated on every worker when edited (forget_user).
+USER_CACHE = "users"
+token_cache = cache.register("tokens", settings.token_cache_max_keys, settings.token_cache_seconds)
+user_cache = cache.register(USER_CACHE, settings.user_cache_max_keys, settings.user_cache_seconds)
+
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -26,6 +34,10 @@ def create_access_token(data: dict):
 
 
 def verify_access_token(token: str, exception):
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return schemas.TokenData(id=user_id)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user_id = payload.get("user_id")
@@ -34,7 +46,10 @@ def verify_access_token(token: str, exception):
             raise exception
 
         # Return UUID object for consistency
-        return schemas.TokenData(id=UUID(user_id))
+        token_data = schemas.TokenData(id=UUID(user_id))
+        expires_in = payload["exp"] - time() if "exp" in payload else None
+        token_cache.put(token, token_data.id, ttl=expires_in)
+        return token_data
 
     except JWTError:
         raise exception
@@ -42,7 +57,7 @@ def verify_access_token(token: str, exception):
 
 def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -52,23 +67,49 @@ def get_current_user(
 
     try:
         token_data = verify_access_token(token=token, exception=exception)
-        print(token_data.id)
-        user = db.query(models.User).filter(models.User.id == token_data.id).first()
+        cached = user_cache.get(str(token_data.id))
+        if cached is not None:
+            return cached
+
+        user = queries.user_by_id(db, token_data.id)  # type: ignore
+        from_primary = db.get_bind() is engine
+
+        # Just-registered users may not have reached the replica yet
+        if user is None and not from_primary:
+            with SessionLocal() as primary:
+                user = queries.user_by_id(primary, token_data.id)  # type: ignore
+            from_primary = True
 
         if user is None:
             raise exception
 
+        user = schemas.User.model_validate(user)
+        # A replica row can predate a forget_user() on another worker and
+        # would then be served for the whole ttl
+        if from_primary:
+            user_cache.put(str(user.id), user)
         return user
 
     except JWTError:
         raise exception
 
-    except Exception as e:
-        # Optional: log this or raise a more specific HTTPException
+
+def forget_user(user_id: UUID):
+    # After any change to a user's row, so no worker serves the old copy
+    cache.invalidate(USER_CACHE, str(user_id))
+
+
+def is_admin(user: schemas.User) -> bool:
+    return user.email.lower() in {email.lower() for email in settings.admin_emails}
+
+
+def get_admin_user(user: schemas.User = Depends(get_current_user)):
+    if not is_admin(user):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Something went wrong in authentication: {str(e)}",
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
         )
+    return user
 
 
 def check_token_validity(
@@ -0,0 +1,250 @@
+"""Sampled request profiling.
+
+Enabled with PROFILER_ENABLED=true. A fraction of requests
+(profiler_sample_rate), and any request from an admin carrying
+`X-Profile: 1`, is profiled by a sampling thread: every
+profiler_interval_ms it reads the stack of every thread and keeps the
+stacks that are inside the request's endpoint or one of its dependencies.
+That covers async handlers on the event loop and sync ones in the
+threadpool. Requests on the same route, or sharing a dependency like
+get_current_user, that run at the same time can add to each other's samples.
+
+Profiles are kept per route and served as folded stacks (for flamegraph.pl
+or speedscope) or as an SVG flamegraph at /debug/profiles.
+"""
+import html
+import itertools
+import sys
+import threading
+import time
+import zlib
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.config import settings
+
+
+class Profile:
+    def __init__(self, profile_id: int, method: str, path: str, scope: dict):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.route = "unmatched"
+        self.started_at = datetime.now(timezone.utc)
+        self.started = time.perf_counter()
+        self.duration_ms = 0.0
+        self.status: Optional[int] = None
+        self.samples = 0
+        # "module.func;module.func" -> samples
+        self.stacks: Counter[str] = Counter()
+        self._scope = scope
+        self._codes: Optional[frozenset] = None
+
+    def codes(self) -> Optional[frozenset]:
+        """Code objects of the endpoint and its dependencies, once routed."""
+        if self._codes is None:
+            route = self._scope.get("route")
+            if route is None:
+                return None
+            self.route = f"{self.method} {getattr(route, 'path', 'unmatched')}"
+            codes = set()
+            dependants = [getattr(route, "dependant", None)]
+            while dependants:
+                dependant = dependants.pop()
+                if dependant is None:
+                    continue
+                code = getattr(dependant.call, "__code__", None)
+                if code is not None:
+                    codes.add(code)
+                dependants.extend(dependant.dependencies)
+            self._codes = frozenset(codes)
+        return self._codes
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "route": self.route,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 2),
+            "samples": self.samples,
+        }
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def folded_stack(frame, codes: frozenset) -> Optional[str]:
+    """Root-first stack from the outermost frame in codes down to frame."""
+    frames = []
+    start = None
+    while frame is not None:
+        frames.append(frame)
+        if frame.f_code in codes:
+            start = len(frames)
+        frame = frame.f_back
+    if start is None:
+        return None
+    return ";".join(frame_name(f) for f in reversed(frames[:start]))
+
+
+class Profiler:
+    def __init__(self, interval_ms: float, keep_per_route: int, max_seconds: float):
+        self.interval = interval_ms / 1000
+        self.keep_per_route = keep_per_route
+        self.max_seconds = max_seconds
+        self._ids = itertools.count(1)
+        self._active: set[Profile] = set()
+        # route -> most recent profiles
+        self._by_route: dict[str, deque[Profile]] = {}
+        self._by_id: dict[int, Profile] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    # Recording ------------------
+
+    def start(self, method: str, path: str, scope: dict) -> Profile:
+        profile = Profile(next(self._ids), method, path, scope)
+        with self._lock:
+            self._active.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample, daemon=True)
+                self._thread.start()
+        return profile
+
+    def finish(self, profile: Profile, status: Optional[int]):
+        profile.duration_ms = (time.perf_counter() - profile.started) * 1000
+        profile.status = status
+        profile.codes()  # names the route if no sample did yet
+        with self._lock:
+            self._active.discard(profile)
+            kept = self._by_route.setdefault(profile.route, deque())
+            kept.append(profile)
+            self._by_id[profile.id] = profile
+            if len(kept) > self.keep_per_route:
+                del self._by_id[kept.popleft().id]
+
+    def _sample(self):
+        # Runs only while requests are being profiled
+        own_id = threading.get_ident()
+        while True:
+            with self._lock:
+                active = list(self._active)
+                if not active:
+                    self._thread = None
+                    return
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            samples = []
+            for profile in active:
+                codes = profile.codes()
+                if not codes or now - profile.started > self.max_seconds:
+                    continue
+                for thread_id, frame in frames.items():
+                    if thread_id == own_id:
+                        continue
+                    stack = folded_stack(frame, codes)
+                    if stack is not None:
+                        samples.append((profile, stack))
+            del frames
+            with self._lock:
+                # Finished profiles may be read by now; they take no more samples
+                for profile, stack in samples:
+                    if profile in self._active:
+                        profile.stacks[stack] += 1
+                        profile.samples += 1
+            time.sleep(self.interval)
+
+    # Reading ------------------
+
+    def routes(self) -> dict[str, list[dict]]:
+        with self._lock:
+            return {
+                route: [profile.summary() for profile in reversed(kept)]
+                for route, kept in self._by_route.items()
+            }
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        # Finished profiles are no longer written to, so callers may read them
+        with self._lock:
+            return self._by_id.get(profile_id)
+
+    def route_stacks(self, route: str) -> Counter:
+        """All kept profiles of a route merged."""
+        merged: Counter[str] = Counter()
+        with self._lock:
+            for profile in self._by_route.get(route, ()):
+                merged.update(profile.stacks)
+        return merged
+
+
+def folded(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+# Flamegraph ------------------
+
+SVG_WIDTH = 1200
+ROW_HEIGHT = 16
+CHAR_WIDTH = 7
+
+
+def flamegraph_svg(stacks: Counter, title: str) -> str:
+    """Self-contained SVG flamegraph: root at the bottom, width ~ samples."""
+    root: dict = {"count": 0, "children": {}}
+    for stack, count in stacks.items():
+        root["count"] += count
+        node = root
+        for name in stack.split(";"):
+            node = node["children"].setdefault(name, {"count": 0, "children": {}})
+            node["count"] += count
+
+    rects = []
+    depth = 0
+
+    def layout(children: dict, x: float, level: int):
+        nonlocal depth
+        depth = max(depth, level + 1)
+        for name, node in sorted(children.items()):
+            width = node["count"] / root["count"] * SVG_WIDTH
+            if width >= 0.5:
+                rects.append((name, node["count"], x, level, width))
+                layout(node["children"], x, level + 1)
+            x += width
+
+    if root["count"]:
+        layout(root["children"], 0.0, 0)
+    height = (depth + 2) * ROW_HEIGHT
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{SVG_WIDTH}" height="{height}" '
+        f'font-family="monospace" font-size="11">',
+        f'<text x="4" y="12">{html.escape(title)} ({root["count"]} samples)</text>',
+    ]
+    for name, count, x, level, width in rects:
+        y = height - (level + 1) * ROW_HEIGHT
+        # Stable warm colour per function
+        hue = zlib.crc32(name.encode()) % 50
+        fits = int(width / CHAR_WIDTH) - 1
+        label = name if len(name) <= fits else name[: fits - 2] + ".."
+        parts.append(
+            f'<g><title>{html.escape(name)} ({count} samples, '
+            f'{count / root["count"]:.1%})</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{width:.1f}" height="{ROW_HEIGHT - 1}" '
+            f'fill="hsl({hue},90%,60%)"/>'
+        )
+        if fits > 3:
+            parts.append(f'<text x="{x + 3:.1f}" y="{y + 11}">{html.escape(label)}</text>')
+        parts.append("</g>")
+    parts.append("</svg>")
+    return "\n".join(parts)
+
+
+profiler = Profiler(
+    interval_ms=settings.profiler_interval_ms,
+    keep_per_route=settings.profiler_keep_per_route,
+    max_seconds=settings.profiler_max_seconds,
+)
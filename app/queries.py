@@ -0,0 +1,33 @@
+"""Hot lookups as lambda statements.
+
+SQLAlchemy caches a lambda statement by the lambda's code location, so
+after the first call neither the statement nor its SQL is rebuilt; only
+the closure values are bound as parameters.
+"""
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import func, lambda_stmt, select
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+def user_by_id(db: Session, user_id: UUID) -> Optional[models.User]:
+    stmt = lambda_stmt(lambda: select(models.User).where(models.User.id == user_id))
+    return db.scalars(stmt).first()
+
+
+def user_by_email(db: Session, email: str) -> Optional[models.User]:
+    # Goes through the lower(email) unique index
+    stmt = lambda_stmt(
+        lambda: select(models.User).where(func.lower(models.User.email) == email)
+    )
+    return db.scalars(stmt).first()
+
+
+def email_exists(db: Session, email: str) -> bool:
+    stmt = lambda_stmt(
+        lambda: select(models.User.id).where(func.lower(models.User.email) == email)
+    )
+    return db.scalars(stmt).first() is not None
@@ -0,0 +1,164 @@
+"""Per-request SQL statement inspection.
+
+Enabled with QUERY_INSPECTOR_ENABLED=true. In tests, wrap requests in
+`query_inspector.capture()` to assert on the statements they issue:
+
+    with query_inspector.capture() as queries:
+        client.get("/tasks/", headers=auth_headers)
+    assert queries.count <= 2
+
+benchmarks/query_counts.py checks the hot endpoints against such budgets.
+"""
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from sqlalchemy import event
+
+from app.config import settings
+
+
+logger = logging.getLogger("app.queries")
+
+
+class QueryCapture:
+    def __init__(self):
+        # (statement, parameters, seconds)
+        self.statements: list[tuple[str, str, float]] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def duplicates(self) -> dict[str, int]:
+        """Statements run more than once with the same parameters."""
+        counts = Counter((statement, params) for statement, params, _ in self.statements)
+        return {statement: n for (statement, _), n in counts.items() if n > 1}
+
+    def n_plus_one(self, threshold: int) -> dict[str, int]:
+        """Statements run at least `threshold` times, whatever the parameters."""
+        counts = Counter(statement for statement, _, _ in self.statements)
+        return {statement: n for statement, n in counts.items() if n >= threshold}
+
+
+current_capture: ContextVar[QueryCapture | None] = ContextVar(
+    "current_capture", default=None
+)
+
+
+class QueryInspector:
+    def __init__(self, slow_query_ms: float, explain: bool, n_plus_one_threshold: int):
+        self.slow_query_seconds = slow_query_ms / 1000
+        self.explain = explain
+        self.n_plus_one_threshold = n_plus_one_threshold
+        # "GET /tasks/" -> aggregated counts
+        self.report: dict[str, dict] = {}
+        self._listeners: list[QueryCapture] = []
+        self._lock = threading.Lock()
+
+    def attach(self, engine):
+        @event.listens_for(engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            context._inspector_started = perf_counter()
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            elapsed = perf_counter() - context._inspector_started
+            entry = (statement, repr(parameters), elapsed)
+
+            capture = current_capture.get()
+            if capture is not None:
+                capture.statements.append(entry)
+            elif self._listeners:
+                # Outside a request, e.g. a test calling the database directly
+                with self._lock:
+                    for listener in self._listeners:
+                        listener.statements.append(entry)
+
+            if elapsed >= self.slow_query_seconds:
+                self.log_slow_query(conn, cursor, statement, parameters, elapsed, executemany)
+
+    @contextmanager
+    def capture(self):
+        capture = QueryCapture()
+        with self._lock:
+            self._listeners.append(capture)
+        try:
+            yield capture
+        finally:
+            with self._lock:
+                self._listeners.remove(capture)
+
+    def record_request(self, endpoint: str, capture: QueryCapture):
+        duplicates = capture.duplicates()
+        with self._lock:
+            for listener in self._listeners:
+                listener.statements.extend(capture.statements)
+
+            entry = self.report.setdefault(
+                endpoint,
+                {"requests": 0, "queries": 0, "max_queries": 0, "repeated": 0},
+            )
+            entry["requests"] += 1
+            entry["queries"] += capture.count
+            entry["max_queries"] = max(entry["max_queries"], capture.count)
+            if duplicates:
+                entry["repeated"] += 1
+
+        for statement, n in duplicates.items():
+            logger.warning("%s repeated identical statement %dx: %s", endpoint, n, statement)
+
+        for statement, n in capture.n_plus_one(self.n_plus_one_threshold).items():
+            logger.warning("%s possible N+1, %dx: %s", endpoint, n, statement)
+
+    def log_slow_query(self, conn, cursor, statement, parameters, elapsed, executemany):
+        plan = ""
+        if self.explain and not executemany and statement.lstrip().upper().startswith("SELECT"):
+            plan = self.explain_plan(conn.dialect.name, cursor.connection, statement, parameters)
+        logger.warning("Slow query (%.1fms): %s\n%s", elapsed * 1000, statement, plan)
+
+    def explain_plan(self, dialect: str, dbapi_connection, statement, parameters) -> str:
+        prefix = "EXPLAIN QUERY PLAN " if dialect == "sqlite" else "EXPLAIN "
+        # On the connection that ran the query, so a slow request never waits
+        # for a second one. A DBAPI cursor doesn't re-trigger these events,
+        # and on Postgres the savepoint keeps a failed EXPLAIN from aborting
+        # the request's transaction.
+        savepoint = dialect == "postgresql"
+        cursor = dbapi_connection.cursor()
+        try:
+            if savepoint:
+                cursor.execute("SAVEPOINT query_inspector_explain")
+            try:
+                cursor.execute(prefix + statement, parameters)
+                rows = cursor.fetchall()
+            except Exception:
+                if savepoint:
+                    cursor.execute("ROLLBACK TO SAVEPOINT query_inspector_explain")
+                raise
+            if savepoint:
+                cursor.execute("RELEASE SAVEPOINT query_inspector_explain")
+            return "\n".join(" ".join(str(col) for col in row) for row in rows)
+        except Exception as e:
+            return f"EXPLAIN failed: {e}"
+        finally:
+            cursor.close()
+
+    def endpoint_report(self) -> dict[str, dict]:
+        with self._lock:
+            return {
+                endpoint: {
+                    **entry,
+                    "avg_queries": round(entry["queries"] / entry["requests"], 2),
+                }
+                for endpoint, entry in self.report.items()
+            }
+
+
+query_inspector = QueryInspector(
+    slow_query_ms=settings.slow_query_ms,
+    explain=settings.query_explain,
+    n_plus_one_threshold=settings.n_plus_one_threshold,
+)
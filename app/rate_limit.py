@@ -0,0 +1,221 @@
+import logging
+import re
+from collections import OrderedDict
+from datetime import timedelta
+from math import ceil
+from time import monotonic
+from typing import Awaitable, Callable, Optional
+
+from fastapi import HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from jose import JWTError, jwt
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app import models
+from app.config import settings
+from app.jobs import job_runner
+
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+PURGE_BATCH_SIZE = 10_000
+MAX_BATCHES_PER_RUN = 100
+
+
+class Limit:
+    """Token bucket holding `burst` tokens, refilled at `rate` tokens per second."""
+
+    def __init__(self, spec: str):
+        match = re.fullmatch(r"\s*(\d+)\s*/\s*(second|minute|hour|day)\s*", spec)
+        if not match:
+            raise ValueError(f"Invalid rate limit {spec!r}, expected e.g. '5/minute'")
+        self.burst = int(match.group(1))
+        self.rate = self.burst / PERIODS[match.group(2)]
+
+
+# Backends ------------------
+# hit() consumes one token and returns 0 when allowed, otherwise the seconds
+# until a token is available.
+
+
+class MemoryBackend:
+    """Per-worker buckets in LRU shards. Only touched from the event loop, so no locks."""
+
+    def __init__(self, max_keys: int = 100_000, shards: int = 16):
+        self._shards: list[OrderedDict[str, tuple[float, float]]] = [
+            OrderedDict() for _ in range(shards)
+        ]
+        self._max_per_shard = max(1, max_keys // shards)
+
+    async def hit(self, key: str, limit: Limit) -> float:
+        shard = self._shards[hash(key) % len(self._shards)]
+        now = monotonic()
+        state = shard.get(key)
+        if state is None:
+            tokens = float(limit.burst)
+        else:
+            tokens = min(limit.burst, state[0] + (now - state[1]) * limit.rate)
+            shard.move_to_end(key)
+
+        if tokens >= 1:
+            shard[key] = (tokens - 1, now)
+            retry_after = 0.0
+        else:
+            shard[key] = (tokens, now)
+            retry_after = (1 - tokens) / limit.rate
+
+        if len(shard) > self._max_per_shard:
+            shard.popitem(last=False)
+        return retry_after
+
+
+class DatabaseBackend:
+    """Buckets shared by all workers: one upsert per check on the rate_limits table."""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    async def hit(self, key: str, limit: Limit) -> float:
+        return await run_in_threadpool(self._hit, key, limit)
+
+    def _hit(self, key: str, limit: Limit) -> float:
+        table = models.RateLimit.__table__
+        # SET expressions all see the row as it was before this update
+        refilled = func.least(
+            limit.burst,
+            table.c.tokens
+            + func.extract("epoch", func.now() - table.c.updated_at) * limit.rate,
+        )
+        stmt = pg_insert(table).values(
+            key=key, tokens=limit.burst - 1, allowed=True, updated_at=func.now()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={
+                "tokens": case((refilled >= 1, refilled - 1), else_=refilled),
+                "allowed": refilled >= 1,
+                "updated_at": func.now(),
+            },
+        ).returning(table.c.tokens, table.c.allowed)
+
+        with self.engine.begin() as connection:
+            tokens, allowed = connection.execute(stmt).one()
+        return 0.0 if allowed else (1 - tokens) / limit.rate
+
+    def purge_idle(self, idle_seconds: float) -> int:
+        """Deletes buckets untouched for idle_seconds, in batches.
+
+        A bucket idle for its whole window has refilled, so it is no
+        different from a missing one.
+        """
+        table = models.RateLimit.__table__
+        cutoff = func.now() - timedelta(seconds=idle_seconds)
+        purged = 0
+        for _ in range(MAX_BATCHES_PER_RUN):
+            idle = (
+                select(table.c.key)
+                .where(table.c.updated_at < cutoff)
+                .limit(PURGE_BATCH_SIZE)
+                .with_for_update(skip_locked=True)
+            )
+            with self.engine.begin() as connection:
+                count = connection.execute(
+                    delete(table).where(table.c.key.in_(idle.scalar_subquery()))
+                ).rowcount
+            purged += count
+            if count < PURGE_BATCH_SIZE:
+                break
+        return purged
+
+
+def create_backend():
+    if settings.rate_limit_backend == "database":
+        from app.database import engine
+
+        return DatabaseBackend(engine)
+    return MemoryBackend(max_keys=settings.rate_limit_max_keys)
+
+
+backend = create_backend()
+# Longest window of any limit defined so far; buckets idle this long are purged
+longest_window = 0.0
+
+
+@job_runner.register("purge_rate_limits", max_attempts=1, concurrency=1, every=3600)
+def purge_rate_limits_job(payload: dict) -> dict:
+    if not isinstance(backend, DatabaseBackend):
+        return {"purged": 0}
+    purged = backend.purge_idle(longest_window or PERIODS["day"])
+    logger.info("Purged %d idle rate limit buckets", purged)
+    return {"purged": purged}
+
+
+# Keys ------------------
+
+
+async def client_ip(request: Request) -> Optional[str]:
+    if settings.rate_limit_trust_forwarded_for:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else None
+
+
+async def body_email(request: Request) -> Optional[str]:
+    # Request.json() caches the body, so the endpoint can still read it
+    try:
+        body = await request.json()
+    except ValueError:
+        return None
+    email = body.get("email") if isinstance(body, dict) else None
+    return email.strip().lower() if isinstance(email, str) else None
+
+
+async def token_user(request: Request) -> Optional[str]:
+    # Signature check only; the endpoint still loads the user from the database
+    authorization = request.headers.get("authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return await client_ip(request)
+    try:
+        payload = jwt.decode(
+            authorization[7:], settings.secret_key, algorithms=[settings.algorithm]
+        )
+    except JWTError:
+        return await client_ip(request)
+    return payload.get("user_id")
+
+
+# Dependency ------------------
+
+
+def rate_limit(
+    name: str,
+    default: str,
+    key: Callable[[Request], Awaitable[Optional[str]]] = client_ip,
+):
+    """Rejects with 429 once the `name` limit for this key is used up.
+
+    `default` is e.g. "5/minute" and can be overridden per name with the
+    RATE_LIMITS setting, e.g. RATE_LIMITS='{"login_email": "3/minute"}'.
+    """
+    global longest_window
+    limit = Limit(settings.rate_limits.get(name, default))
+    longest_window = max(longest_window, limit.burst / limit.rate)
+
+    async def check(request: Request):
+        if not settings.rate_limit_enabled:
+            return
+        identity = await key(request)
+        if identity is None:
+            return
+        retry_after = await backend.hit(f"{name}:{identity}", limit)
+        if retry_after > 0:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, try again later",
+                headers={"Retry-After": str(ceil(retry_after))},
+            )
+
+    return check
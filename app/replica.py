@@ -0,0 +1,65 @@
+from time import monotonic
+from typing import Optional
+
+from fastapi import Request
+from jose import JWTError, jwt
+
+from app import cache
+from app.config import settings
+
+
+PURGE_THRESHOLD = 10_000
+
+
+def request_user_id(request: Request) -> Optional[str]:
+    # Signature check only, this runs before the user is loaded
+    authorization = request.headers.get("authorization", "")
+    if not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        payload = jwt.decode(
+            authorization[7:], settings.secret_key, algorithms=[settings.algorithm]
+        )
+    except JWTError:
+        return None
+    return payload.get("user_id")
+
+
+class ReadYourWrites:
+    """Users who committed recently and must read from the primary for a while.
+
+    Marks are broadcast to the other workers on this host (app.cache), so a
+    follow-up request is sticky whichever worker it lands on. Across hosts,
+    keep replica lag below the window or route users to hosts consistently.
+    """
+
+    TOPIC = "read_your_writes"
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._until: dict[str, float] = {}
+        cache.subscribe(self.TOPIC, self._set)
+
+    def mark(self, user_id: Optional[str]):
+        if user_id is None:
+            return
+        # A burst of writes announces itself once per half window
+        if self._until.get(user_id, 0.0) - monotonic() < self.seconds / 2:
+            cache.broadcast(self.TOPIC, user_id)
+        self._set(user_id)
+
+    def _set(self, user_id: str):
+        now = monotonic()
+        self._until[user_id] = now + self.seconds
+        if len(self._until) > PURGE_THRESHOLD:
+            for key, until in list(self._until.items()):
+                if until < now:
+                    self._until.pop(key, None)
+
+    def is_sticky(self, user_id: Optional[str]) -> bool:
+        if user_id is None:
+            return False
+        return self._until.get(user_id, 0.0) > monotonic()
+
+
+read_your_writes = ReadYourWrites(settings.read_your_writes_seconds)
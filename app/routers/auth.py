@@ -1,68 +1,74 @@
 from fastapi import Depends, HTTPException, status, APIRouter, Body
+from fastapi.concurrency import run_in_threadpool
 from pydantic import EmailStr
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
-from app import models, oauth2, schemas, utils
+from app import jobs, models, oauth2, queries, schemas, utils
 from app.config import settings
 from app.database import get_db
-from sqlalchemy.exc import SQLAlchemyError
+from app.errors import AppError
+from app.rate_limit import body_email, rate_limit
+from sqlalchemy.exc import IntegrityError
 
 from app.schemas import EmailRequest, CodeRequest
-from app.services.otp_service import send_otp_email
+from app.services.email_filter import email_filter
+from app.services.google_oauth import google_oauth
+from app.services.otp_service import generate_otp
 import httpx
+from jose import JWTError
+import logging
 import os
+import time
 from datetime import datetime
 
 router = APIRouter(tags=["Authentication"])
 
-# Existing login route
-@router.post("/login", response_model=schemas.UserAuthOut)
-def login(credential: schemas.UserLogin, db: Session = Depends(get_db)):
-    try:
-        user = (
-            db.query(models.User).filter(
-                credential.email == models.User.email).first()
-        )
-
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Email does not exist",
-            )
+logger = logging.getLogger(__name__)
 
-        if not utils.verify_password(credential.password, user.password) is True:  # type: ignore
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid Credentials",
-            )
-
-        access_token = oauth2.create_access_token({"user_id": str(user.id)})
+OTP_DEDUPE_SECONDS = 30
 
-        return schemas.UserAuthOut(
-            access_token=access_token,
-            token_type="bearer",
-            user=schemas.User.model_validate(user),
-        )
+# Existing login route
+@router.post(
+    "/login",
+    response_model=schemas.UserAuthOut,
+    dependencies=[
+        Depends(rate_limit("login_ip", "20/minute")),
+        Depends(rate_limit("login_email", "5/minute", key=body_email)),
+    ],
+)
+def login(credential: schemas.UserLogin, db: Session = Depends(get_db)):
+    user = queries.user_by_email(db, credential.email)
 
-    except SQLAlchemyError as e:
-        db.rollback()
+    if not user:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Database error: {str(e)}",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Email does not exist",
         )
-    except Exception as e:
+
+    if not utils.verify_password(credential.password, user.password) is True:  # type: ignore
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An unexpected error occurred: {str(e)}",
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid Credentials",
         )
 
+    access_token = oauth2.create_access_token({"user_id": str(user.id)})
+
+    return schemas.UserAuthOut(
+        access_token=access_token,
+        token_type="bearer",
+        user=schemas.User.model_validate(user),
+    )
+
 # Existing register route
 @router.post(
     "/register", response_model=schemas.UserAuthOut, status_code=status.HTTP_201_CREATED
 )
 def register(user: schemas.UserRegister, db: Session = Depends(get_db)):
     try:
-        existing = db.query(models.User).filter(models.User.email == user.email).first()
-        if existing:
+        # A filter miss means the email is new; the unique constraint still guards races
+        if email_filter.might_exist(user.email) and queries.email_exists(db, user.email):
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
                 detail="Email already exists",
@@ -74,6 +80,7 @@ def register(user: schemas.UserRegister, db: Session = Depends(get_db)):
         db.add(new_user)
         db.commit()
         db.refresh(new_user)
+        email_filter.add(new_user.email)  # type: ignore
 
         access_token = oauth2.create_access_token({"user_id": str(new_user.id)})
         return schemas.UserAuthOut(
@@ -82,68 +89,62 @@ def register(user: schemas.UserRegister, db: Session = Depends(get_db)):
             user=schemas.User.model_validate(new_user),
         )
 
-    except SQLAlchemyError as e:
+    except IntegrityError:
         db.rollback()
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Database error: {str(e)}",
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Email already exists",
         )
 
 # Existing change password route
 @router.post("/change_password", response_model=schemas.ChangePasswordOut)
 def change_password(request: schemas.ChangePassword, db: Session = Depends(get_db)):
-    try:
-        # Find the user
-        existing = (
-            db.query(models.User).filter(models.User.email == request.email).first()
-        )
-        if not existing:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Email does not exist",
-            )
-
-        # Check if old password is correct
-        is_verified = utils.verify_password(request.old_password, existing.password)  # type: ignore
-        if not is_verified:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Incorrect current password",
-            )
-
-        # Update to new hashed password
-        hashed_password = utils.get_password_hash(request.new_password)
-        existing.password = hashed_password  # type: ignore
-        db.commit()
-
-        return schemas.ChangePasswordOut(
-            success=True, message="Password updated successfully"
+    # Find the user
+    existing = queries.user_by_email(db, request.email)
+    if not existing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Email does not exist",
         )
 
-    except SQLAlchemyError as e:
-        db.rollback()
+    # Check if old password is correct
+    is_verified = utils.verify_password(request.old_password, existing.password)  # type: ignore
+    if not is_verified:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Database error: {str(e)}",
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect current password",
         )
 
+    # Update to new hashed password
+    hashed_password = utils.get_password_hash(request.new_password)
+    existing.password = hashed_password  # type: ignore
+    db.commit()
+
+    return schemas.ChangePasswordOut(
+        success=True, message="Password updated successfully"
+    )
+
 # Existing send OTP route
 @router.post(
     "/send_otp",
     response_model=schemas.OtpOut,
+    dependencies=[
+        Depends(rate_limit("send_otp_ip", "10/hour")),
+        Depends(rate_limit("send_otp_email", "5/hour", key=body_email)),
+    ],
 )
-def send_otp(request: schemas.Otp):
-    try:
-        otp = send_otp_email(receiver_email=request.email)
-        return schemas.OtpOut(otp=otp, message="Otp sent successfully")
-
-    except HTTPException as e:
-        raise e
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error sending otp: {str(e)}",
-        )
+def send_otp(request: schemas.Otp, db: Session = Depends(get_db)):
+    # The email goes out from the job runner. Repeats inside the window
+    # (double submits, client retries) get the same job and OTP.
+    window = int(time.time() // OTP_DEDUPE_SECONDS)
+    job = jobs.enqueue(
+        db,
+        "send_otp_email",
+        {"email": request.email, "otp": generate_otp()},
+        idempotency_key=f"send_otp:{request.email}:{window}",
+    )
+    db.commit()
+    return schemas.OtpOut(otp=job.payload["otp"], message="Otp sent successfully")
 
 
 
@@ -151,72 +152,85 @@ def send_otp(request: schemas.Otp):
 @router.post(
     "/is_email_available",
     response_model= dict[str, bool],
+    dependencies=[Depends(rate_limit("is_email_available_ip", "60/minute"))],
 )
 def is_email_available(
         email: EmailRequest,
         db: Session = Depends(get_db),
 ):
-    try:
-        user = db.query(models.User).filter(models.User.email == email.email).first()
-        if not user:
-            return {'is_email_available' : True}
-        else:
-            return {'is_email_available' : False}
-
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"{str(e)}",
-        )
-
-
-# New Google authentication route (Only requests data, no DB storage)
+    # Definite filter misses skip the database only when no other process
+    # can have registered the email since the last sync
+    if email_filter.authoritative and not email_filter.might_exist(email.email):
+        return {'is_email_available' : True}
+
+    return {'is_email_available' : not queries.email_exists(db, email.email)}
+
+
+def upsert_google_user(db: Session, email: str, name: str, picture: str | None):
+    # One INSERT ... ON CONFLICT (email) DO UPDATE ... RETURNING round trip.
+    # The update only fills a missing avatar, so profile edits are kept.
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(models.User).values(
+        email=email, name=name, user_type="google", profile_img=picture
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[func.lower(models.User.email)],
+        set_={
+            "profile_img": func.coalesce(models.User.profile_img, stmt.excluded.profile_img)
+        },
+    ).returning(models.User)
+    user = db.scalars(stmt, execution_options={"populate_existing": True}).one()
+    db.commit()
+    oauth2.forget_user(user.id)
+    email_filter.add(email)
+    return user
+
+
+# Google authentication route: upserts the user and issues a DayTask token
 @router.post("/google_auth", response_model=schemas.UserAuthOut)
-async def google_auth_account(code: CodeRequest = Body(...)):
+async def google_auth_account(
+    code: CodeRequest = Body(...),
+    db: Session = Depends(get_db),
+):
     try:
-        # Exchange authorization code for access token
-        token_url = "https://oauth2.googleapis.com/token"
-        token_data = {
-            "code": code.code,
-            "client_id": settings.google_client_id,
-            "client_secret": settings.google_client_secret,
-            "redirect_uri": settings.google_redirect_uri,
-            "grant_type": "authorization_code",
-        }
-
-        async with httpx.AsyncClient() as client:
-            token_response = await client.post(token_url, data=token_data)
-            token_response.raise_for_status()  # Raises exception if response isn't 200
-
-        access_token = token_response.json().get("access_token")
-
-        # Fetch user info from Google
-        user_info_url = "https://www.googleapis.com/oauth2/v2/userinfo"
-        headers = {"Authorization": f"Bearer {access_token}"}
-
-        async with httpx.AsyncClient() as client:
-            user_response = await client.get(user_info_url, headers=headers)
-            user_response.raise_for_status()
-
-        user_data = user_response.json()
-        email = user_data.get("email")
+        _, user_data = await google_oauth.authenticate(code.code)
+        email = utils.normalize_email(user_data.get("email") or "")
         name = user_data.get("name", "Google User")
 
         if not email:
             raise HTTPException(status_code=400, detail="Email not provided by Google")
 
-        # Return user data without storing
+        user = await run_in_threadpool(
+            upsert_google_user, db, email, name, user_data.get("picture")
+        )
+        access_token = oauth2.create_access_token({"user_id": str(user.id)})
+
         return schemas.UserAuthOut(
             access_token=access_token,
             token_type="bearer",
-            user=schemas.User(email=email, name=name, user_type="google")
+            user=schemas.User.model_validate(user),
         )
 
-    except Exception as e:
-        if isinstance(e, httpx.HTTPStatusError):
-            raise HTTPException(
-                status_code=500,
-                detail=f"Error: {str(e)} - Response: {e.response.text}"
+    except JWTError as e:
+        raise HTTPException(status_code=401, detail=f"Invalid Google ID token: {str(e)}")
+    except httpx.HTTPStatusError as e:
+        # Google answers a used or expired code with a 4xx; that is the client's to fix
+        if e.response.status_code < 500:
+            raise AppError(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid or expired Google authorization code",
+                code="invalid_google_code",
             )
-        else:
-            raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
\ No newline at end of file
+        logger.warning("Google sign-in failed: %s", e)
+        raise AppError(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Could not reach Google",
+            code="google_unavailable",
+        )
+    except httpx.HTTPError as e:
+        logger.warning("Google sign-in failed: %s", e)
+        raise AppError(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Could not reach Google",
+            code="google_unavailable",
+        )
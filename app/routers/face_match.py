@@ -1,14 +1,49 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, status
-import boto3
+import logging
+import uuid
+
+from fastapi import APIRouter, Depends, File, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
 from botocore.exceptions import BotoCoreError, ClientError
+from sqlalchemy.orm import Session
+
+from app import jobs, oauth2, schemas
+from app.config import settings
+from app.database import get_db
+from app.errors import AppError
+from app.rate_limit import rate_limit, token_user
+from app.services import storage
 
 router = APIRouter( tags=["Face Matching"])
 
-# Rekognition client (ensure region is correct and supported)
-rekognition = boto3.client("rekognition", region_name="us-east-1")
+logger = logging.getLogger(__name__)
+
+SIMILARITY_THRESHOLD = 80
+
+# Rekognition client (ensure region is correct and supported).
+# Created on first use or during warm-up: importing boto3 is slow.
+rekognition = None
+
+
+def get_rekognition():
+    global rekognition
+    if rekognition is None:
+        import boto3
 
+        rekognition = boto3.client("rekognition", region_name="us-east-1")
+    return rekognition
 
-@router.post("/match-face")
+
+def match_result(response: dict) -> dict:
+    matches = response.get("FaceMatches", [])
+    if matches:
+        return {"match": True, "similarity": matches[0]["Similarity"]}
+    return {"match": False, "similarity": 0}
+
+
+@router.post(
+    "/match-face",
+    dependencies=[Depends(rate_limit("match_face", "10/minute", key=token_user))],
+)
 async def match_faces(
     source: UploadFile = File(...),
     target: UploadFile = File(...),
@@ -17,26 +52,89 @@ async def match_faces(
         source_bytes = await source.read()
         target_bytes = await target.read()
 
-        response = rekognition.compare_faces(
+        # boto3 blocks, so keep it off the event loop
+        response = await run_in_threadpool(
+            get_rekognition().compare_faces,
             SourceImage={"Bytes": source_bytes},
             TargetImage={"Bytes": target_bytes},
-            SimilarityThreshold=80,
+            SimilarityThreshold=SIMILARITY_THRESHOLD,
         )
-
-        matches = response.get("FaceMatches", [])
-        if matches:
-            similarity = matches[0]["Similarity"]
-            return {"match": True, "similarity": similarity}
-        else:
-            return {"match": False, "similarity": 0}
+        return match_result(response)
 
     except (BotoCoreError, ClientError) as e:
-        raise HTTPException(
+        logger.warning("Rekognition compare_faces failed: %s", e)
+        raise AppError(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"AWS Rekognition error: {str(e)}",
+            detail="AWS Rekognition error",
+            code="rekognition_error",
+        )
+
+
+# Deferred variant: the images go to S3 and Rekognition reads them from there
+# in a job; poll GET /jobs/{id} for the result.
+@router.post(
+    "/match-face/jobs",
+    response_model=schemas.JobOut,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(rate_limit("match_face", "10/minute", key=token_user))],
+)
+async def enqueue_match_faces(
+    source: UploadFile = File(...),
+    target: UploadFile = File(...),
+    user_data: schemas.User = Depends(oauth2.get_current_user),
+    db: Session = Depends(get_db),
+):
+    bucket = settings.face_match_bucket or settings.avatar_bucket
+    prefix = f"face-match/{user_data.id}/{uuid.uuid4().hex}"
+    keys = {"source": f"{prefix}/source", "target": f"{prefix}/target"}
+    try:
+        for upload, key in ((source, keys["source"]), (target, keys["target"])):
+            await run_in_threadpool(
+                storage.get_s3_client().put_object,
+                Bucket=bucket,
+                Key=key,
+                Body=await upload.read(),
+                ContentType=upload.content_type or "application/octet-stream",
+            )
+
+        job = await run_in_threadpool(
+            enqueue_compare_faces, db, str(user_data.id), bucket, keys
         )
-    except Exception as e:
-        raise HTTPException(
+        return schemas.JobOut.model_validate(job)
+
+    except (BotoCoreError, ClientError) as e:
+        logger.warning("Could not upload face match images: %s", e)
+        raise AppError(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Unexpected error: {str(e)}",
+            detail="AWS S3 error",
+            code="storage_error",
         )
+
+
+def enqueue_compare_faces(db: Session, owner_id: str, bucket: str, keys: dict):
+    job = jobs.enqueue(
+        db,
+        "compare_faces",
+        {"bucket": bucket, "source_key": keys["source"], "target_key": keys["target"]},
+        owner_id=owner_id,
+    )
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+@jobs.job_runner.register("compare_faces", max_attempts=3, concurrency=4)
+def compare_faces_job(payload: dict) -> dict:
+    bucket = payload["bucket"]
+    response = get_rekognition().compare_faces(
+        SourceImage={"S3Object": {"Bucket": bucket, "Name": payload["source_key"]}},
+        TargetImage={"S3Object": {"Bucket": bucket, "Name": payload["target_key"]}},
+        SimilarityThreshold=SIMILARITY_THRESHOLD,
+    )
+    # Kept until success so retries can read them; a bucket lifecycle rule on
+    # face-match/ cleans up after jobs that fail for good
+    storage.get_s3_client().delete_objects(
+        Bucket=bucket,
+        Delete={"Objects": [{"Key": payload["source_key"]}, {"Key": payload["target_key"]}]},
+    )
+    return match_result(response)
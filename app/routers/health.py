@@ -0,0 +1,28 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from app.lifecycle import lifecycle
+
+
+router = APIRouter(tags=["Health"])
+
+
+# Liveness: the process is up and serving the event loop
+@router.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+# Readiness: warmed up, not draining and the database answers
+@router.get("/readyz")
+async def readyz():
+    checks = {
+        "warmed_up": lifecycle.ready,
+        "draining": lifecycle.draining,
+        "database": await lifecycle.database_ok() if lifecycle.ready else False,
+    }
+    ready = checks["warmed_up"] and not checks["draining"] and checks["database"]
+    return JSONResponse(
+        {"status": "ok" if ready else "unavailable", "checks": checks},
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
@@ -0,0 +1,25 @@
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app import models, oauth2, schemas
+from app.database import get_db
+
+
+router = APIRouter(tags=["Jobs"], prefix="/jobs")
+
+
+# Status and result of a background job started by the current user.
+# Reads the primary: job rows change too quickly for replica lag.
+@router.get("/{id}", response_model=schemas.JobOut)
+def get_job(
+    id: UUID,
+    user_data: schemas.User = Depends(oauth2.get_current_user),
+    db: Session = Depends(get_db),
+):
+    job = db.get(models.Job, id)
+    if job is None or job.owner_id != str(user_data.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No job found.",
+        )
+    return job
@@ -0,0 +1,61 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse, Response
+from app import oauth2
+from app.profiler import flamegraph_svg, folded, profiler
+
+
+# Registered only when the profiler is enabled
+router = APIRouter(
+    tags=["Debug"],
+    prefix="/debug/profiles",
+    include_in_schema=False,
+    dependencies=[Depends(oauth2.get_admin_user)],
+)
+
+
+def stacks_response(stacks, title: str, format: str) -> Response:
+    if format == "folded":
+        # For flamegraph.pl, speedscope and friends
+        return PlainTextResponse(folded(stacks))
+    return Response(flamegraph_svg(stacks, title), media_type="image/svg+xml")
+
+
+# Kept profiles per route, newest first
+@router.get("")
+async def list_profiles():
+    return profiler.routes()
+
+
+# All kept profiles of one route merged, e.g. ?route=POST /register
+@router.get("/flamegraph")
+async def route_flamegraph(route: str, format: Literal["svg", "folded"] = "svg"):
+    stacks = profiler.route_stacks(route)
+    if not stacks:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No samples for this route.",
+        )
+    return stacks_response(stacks, route, format)
+
+
+@router.get("/{id}")
+async def get_profile(id: int):
+    profile = profiler.get(id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No profile found.",
+        )
+    return {**profile.summary(), "stacks": dict(profile.stacks.most_common())}
+
+
+@router.get("/{id}/flamegraph")
+async def profile_flamegraph(id: int, format: Literal["svg", "folded"] = "svg"):
+    profile = profiler.get(id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No profile found.",
+        )
+    return stacks_response(profile.stacks, f"{profile.route} #{profile.id}", format)
@@ -0,0 +1,49 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from app import oauth2
+from app.database import SessionLocal
+from app.services.task_events import hub
+
+
+router = APIRouter(tags=["Realtime"])
+
+
+def authenticate(token: str):
+    # Short-lived session so open sockets don't pin pool connections
+    db = SessionLocal()
+    try:
+        return oauth2.get_current_user(token=token, db=db)
+    finally:
+        db.close()
+
+
+# Live task updates for the current user
+@router.websocket("/ws/tasks")
+async def task_updates(websocket: WebSocket, token: str = Query(...)):
+    try:
+        user = await run_in_threadpool(authenticate, token)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription = hub.subscribe([str(user.id), user.email])
+
+    async def forward_events():
+        while True:
+            event = await subscription.queue.get()
+            await websocket.send_json(event)
+
+    sender = asyncio.create_task(forward_events())
+    try:
+        # Clients don't send anything; reading only detects the disconnect
+        while True:
+            await websocket.receive_text()
+
+    except WebSocketDisconnect:
+        pass
+
+    finally:
+        sender.cancel()
+        hub.unsubscribe(subscription)
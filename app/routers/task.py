@@ -1,10 +1,17 @@
-from typing import List
+from datetime import datetime, timezone
+from typing import List, Literal, Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+import anyio
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from app import models, oauth2, schemas
-from app.database import get_db
+from app.database import get_db, get_read_db
+from app.errors import AppError
+from app.services.task_events import hub
+from app.services import task_archive, task_stats, task_transfer
+from app.services.task_search import inverted_index, search_tasks
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import SQLAlchemyError
 
 
 router = APIRouter(tags=["Tasks"], prefix="/tasks")
@@ -14,28 +21,130 @@ router = APIRouter(tags=["Tasks"], prefix="/tasks")
 @router.get("/", response_model=List[schemas.Task])
 def get_my_tasks(
     user_data: schemas.User = Depends(oauth2.get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    try:
-        task_query = db.query(models.Task).filter(
-            models.Task.owner_id == str(user_data.id)
+    task_query = db.query(models.Task).filter(
+        models.Task.owner_id == str(user_data.id),
+        models.Task.deleted_at.is_(None),
+    )
+    db_tasks = task_query.all()
+
+    if not db_tasks:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No tasks found.",
         )
-        db_tasks = task_query.all()
 
-        if not db_tasks:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No tasks found.",
-            )
+    return db_tasks
 
-        return db_tasks
 
-    except SQLAlchemyError as e:
+# Completed tasks moved to the archive, newest first.
+# Pass the created_at and id of the last task as `before` and `before_id` for the next page.
+@router.get("/archived", response_model=List[schemas.Task])
+def get_my_archived_tasks(
+    limit: int = 50,
+    before: Optional[datetime] = None,
+    before_id: Optional[UUID] = None,
+    user_data: schemas.User = Depends(oauth2.get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    if limit > 100 or limit < 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Limit must be between 1 and 100.",
+        )
+
+    return task_archive.archived_tasks(db, str(user_data.id), limit, before, before_id)
+
+
+# Searching my tasks by title and details, best matches first
+@router.get("/search", response_model=schemas.TaskSearchOut)
+def search_my_tasks(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = 20,
+    offset: int = 0,
+    user_data: schemas.User = Depends(oauth2.get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    if limit > 100 or limit < 1 or offset < 0:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Database error: " + str(e),
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Limit must be between 1 and 100 and offset positive.",
+        )
+
+    # One extra row tells whether there is a next page
+    hits = search_tasks(db, str(user_data.id), q, limit + 1, offset)
+    return schemas.TaskSearchOut(
+        tasks=[
+            schemas.TaskSearchHit(
+                **schemas.Task.model_validate(task).model_dump(), rank=rank
+            )
+            for task, rank in hits[:limit]
+        ],
+        next_offset=offset + limit if len(hits) > limit else None,
+    )
+
+
+# Completed vs pending counts, overall and per day
+@router.get("/stats", response_model=schemas.TaskStats)
+def get_my_task_stats(
+    user_data: schemas.User = Depends(oauth2.get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    return task_stats.get_stats(db, str(user_data.id))
+
+
+# Downloading all my tasks, streamed as NDJSON or CSV
+@router.get("/export")
+def export_my_tasks(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    include_archived: bool = False,
+    user_data: schemas.User = Depends(oauth2.get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    return StreamingResponse(
+        task_transfer.export_tasks(db.get_bind(), str(user_data.id), format, include_archived),
+        media_type=task_transfer.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'},
+    )
+
+
+def blocking_chunks(request: Request):
+    # Lets the import run in a worker thread while the body streams in
+    stream = request.stream()
+    while True:
+        try:
+            yield anyio.from_thread.run(stream.__anext__)
+        except StopAsyncIteration:
+            return
+
+
+# Uploading tasks in bulk; text/csv or NDJSON (the default) in the body
+@router.post("/import", response_model=schemas.TaskImportOut, status_code=status.HTTP_201_CREATED)
+async def import_my_tasks(
+    request: Request,
+    user_data: schemas.User = Depends(oauth2.get_current_user),
+    db: Session = Depends(get_db),
+):
+    owner_id = str(user_data.id)
+    content_type = request.headers.get("content-type", "")
+    format = "csv" if content_type.startswith("text/csv") else "ndjson"
+    try:
+        imported = await run_in_threadpool(
+            task_transfer.import_tasks, db, owner_id, format, blocking_chunks(request)
         )
 
+    except task_transfer.ImportRowError as e:
+        raise AppError(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e),
+            code="invalid_import_row",
+        )
+
+    inverted_index.invalidate(owner_id)
+    hub.resync([owner_id])
+    return schemas.TaskImportOut(imported=imported)
+
 
 # Creating new task
 @router.post("/", response_model=schemas.Task, status_code=status.HTTP_201_CREATED)
@@ -44,26 +153,18 @@ def create_task(
     user_data: schemas.User = Depends(oauth2.get_current_user),
     db: Session = Depends(get_db),
 ):
-    try:
-        new_task.owner_id = str(user_data.id)
-        db_task = models.Task(**new_task.model_dump())
-        db.add(db_task)
-        db.commit()
-        db.refresh(db_task)
+    new_task.owner_id = str(user_data.id)
+    db_task = models.Task(**new_task.model_dump())
+    db.add(db_task)
+    db.flush()
+    task_stats.record_created(db, db_task)
+    db.commit()
+    db.refresh(db_task)
 
-        return db_task
-
-    except SQLAlchemyError as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Database error: " + str(e),
-        )
-
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Something went wrong: " + str(e),
-        )
+    task = schemas.Task.model_validate(db_task)
+    inverted_index.invalidate(task.owner_id)
+    hub.publish("created", task.model_dump(mode="json"))
+    return task
 
 
 # Deleting task
@@ -75,29 +176,34 @@ def delete_task(
     user_data: schemas.User = Depends(oauth2.get_current_user),
     db: Session = Depends(get_db),
 ):
-    try:
-        task_query = db.query(models.Task).filter(models.Task.id == id)
-        db_task = task_query.first()
-        # No tasks found with id in db
-        if not db_task:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No task found.",
-            )
-        # User can only edit his own tasks
-        if db_task.owner_id != str(user_data.id): # type: ignore
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Unauthorized to edit this task.",
-            )
-        task_query.delete(synchronize_session=False)
-        db.commit()
-
-    except SQLAlchemyError as e:
+    task_query = db.query(models.Task).filter(
+        models.Task.id == id, models.Task.deleted_at.is_(None)
+    )
+    # Row lock keeps the counters in step with concurrent edits
+    db_task = task_query.with_for_update().first()
+    if not db_task and task_archive.restore(db, id):
+        db_task = task_query.with_for_update().first()
+    # No tasks found with id in db
+    if not db_task:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Database error: " + str(e),
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No task found.",
         )
+    # User can only edit his own tasks
+    if db_task.owner_id != str(user_data.id): # type: ignore
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Unauthorized to edit this task.",
+        )
+    deleted = schemas.Task.model_validate(db_task).model_dump(mode="json")
+    # Soft delete: a flag flip now, the row is purged in batches later
+    task_query.update(
+        {"deleted_at": datetime.now(timezone.utc)}, synchronize_session=False
+    )
+    task_stats.record_deleted(db, db_task)
+    db.commit()
+    inverted_index.invalidate(deleted["owner_id"])
+    hub.publish("deleted", deleted)
 
 
 # Editing task
@@ -108,29 +214,32 @@ def update_task(
     user_data: schemas.User = Depends(oauth2.get_current_user),
     db: Session = Depends(get_db),
 ):
-    try:
-        task_query = db.query(models.Task).filter(models.Task.id == id)
-        db_task = task_query.first()
-        # No tasks found with id in db
-        if not db_task:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No task found.",
-            )
-        # User can only edit his own tasks
-        if db_task.owner_id != str(user_data.id): # type: ignore
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Unauthorized to edit this task.",
-            )
-        task_query.update(updated_task.model_dump(), synchronize_session=False) # type: ignore
-        db.commit()
-        db.refresh(db_task)
-
-        return db_task
-
-    except SQLAlchemyError as e:
+    task_query = db.query(models.Task).filter(
+        models.Task.id == id, models.Task.deleted_at.is_(None)
+    )
+    # Row lock keeps the counters in step with concurrent edits
+    db_task = task_query.with_for_update().first()
+    if not db_task and task_archive.restore(db, id):
+        db_task = task_query.with_for_update().first()
+    # No tasks found with id in db
+    if not db_task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No task found.",
+        )
+    # User can only edit his own tasks
+    if db_task.owner_id != str(user_data.id): # type: ignore
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Database error: " + str(e),
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Unauthorized to edit this task.",
         )
+    counted = task_stats.snapshot(db_task)
+    task_query.update(updated_task.model_dump(), synchronize_session=False) # type: ignore
+    db.refresh(db_task)
+    task_stats.record_updated(db, counted, db_task)
+    db.commit()
+
+    task = schemas.Task.model_validate(db_task)
+    inverted_index.invalidate(task.owner_id)
+    hub.publish("updated", task.model_dump(mode="json"))
+    return task
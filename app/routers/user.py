@@ -1,27 +1,29 @@
+import logging
 from typing import Optional
 from uuid import UUID
-from fastapi import Depends, HTTPException, status, APIRouter
+from botocore.exceptions import BotoCoreError, ClientError
+from fastapi import BackgroundTasks, Depends, HTTPException, status, APIRouter
+from fastapi.concurrency import run_in_threadpool
 from pydantic import EmailStr
 from sqlalchemy.orm import Session
 from app import models, oauth2, schemas
-from app.database import get_db
+from app.config import settings
+from app.database import SessionLocal, get_db, get_read_db
+from app.errors import AppError
+from app.services import storage
 
 
 router = APIRouter(tags=["Users"])
 
+logger = logging.getLogger(__name__)
+
 
 # Getting current user
 @router.get("/user", response_model=schemas.UserOut)
 def get_current_user(
     user_data: schemas.User = Depends(oauth2.get_current_user),
 ):
-    try:
-        return schemas.UserOut(user=user_data)
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An error occurred: {str(e)}",
-        )
+    return schemas.UserOut(user=user_data)
 
 
 # PATCH /user/edit
@@ -31,28 +33,25 @@ def edit_current_user(
     user_data: schemas.User = Depends(oauth2.get_current_user),
     db: Session = Depends(get_db),
 ):
-    try:
-        user_query = db.query(models.User).filter(
-            user_data.id == models.User.id)
-        user = user_query.first()
+    user_query = db.query(models.User).filter(
+        user_data.id == models.User.id)
+    user = user_query.first()
 
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No user found",
-            )
-
-        user_query.update(user_edit.model_dump(), synchronize_session=False)  # type: ignore
-        db.commit()
-        db.refresh(user)  # Refresh to get updated values
-        return schemas.UserOut(user=user)
-
-    except Exception as e:
+    if not user:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An error occurred: {str(e)}",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No user found",
         )
 
+    changes = user_edit.model_dump()
+    if changes["profile_img"] != user.profile_img:
+        changes["profile_thumbnails"] = None  # Thumbnails of the old image
+    user_query.update(changes, synchronize_session=False)  # type: ignore
+    db.commit()
+    oauth2.forget_user(user.id)
+    db.refresh(user)  # Refresh to get updated values
+    return schemas.UserOut(user=user)
+
 
 # Getting a user by ID
 @router.get(
@@ -62,28 +61,28 @@ def edit_current_user(
 )
 def get_user_by_id(
     id: UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    try:
-        user_query = db.query(models.User).filter(id == models.User.id)
-        user = user_query.first()
-
-        if not user:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"There is no user with id: {id}",
-            )
+    user_query = db.query(models.User).filter(id == models.User.id)
+    user = user_query.first()
 
-        return schemas.UserOut(user=schemas.User.model_validate(user))
-
-    except HTTPException as e:
-        raise e  # Reraise the HTTPException for custom error handling
-    except Exception as e:
+    if not user:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An error occurred while fetching the user: {str(e)}",
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"There is no user with id: {id}",
         )
 
+    return schemas.UserOut(user=schemas.User.model_validate(user))
+
+
+def user_list_item(user: models.User) -> schemas.User:
+    # Lists show the smallest thumbnail instead of the full-size avatar
+    item = schemas.User.model_validate(user)
+    if user.profile_thumbnails:
+        smallest = str(min(settings.thumbnail_sizes))
+        item.profile_img = user.profile_thumbnails.get(smallest, item.profile_img)  # type: ignore
+    return item
+
 
 # Getting all users
 @router.get(
@@ -92,47 +91,127 @@ def get_user_by_id(
     dependencies=[Depends(oauth2.check_token_validity)],
 )
 def get_users_with_cursor(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     limit: int = 10,  # Default to 10 users per page
     cursor: Optional[UUID] = None,  # Cursor to indicate where to start fetching users
 ):
-    try:
-        if limit > 100:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Limit exceeds the maximum allowed value of 100.",
-            )
+    if limit > 100:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Limit exceeds the maximum allowed value of 100.",
+        )
+
+    # Get the total number of users
+    total_users = db.query(models.User).count()
 
-        # Get the total number of users
-        total_users = db.query(models.User).count()
+    # Query for users starting from the given cursor (if any)
+    query = db.query(models.User).order_by(models.User.id)
 
-        # Query for users starting from the given cursor (if any)
-        query = db.query(models.User).order_by(models.User.id)
+    if cursor:
+        query = query.filter(models.User.id > cursor)
 
-        if cursor:
-            query = query.filter(models.User.id > cursor)
+    users_query = query.limit(limit).all()
 
-        users_query = query.limit(limit).all()
+    if not users_query:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No users found.",
+        )
+
+    users_list = [user_list_item(user) for user in users_query]
+
+    # Get the id of the last user to be used as the cursor for the next request
+    next_cursor = users_query[-1].id if users_query else None
+    # Correctly assign the id value
 
-        if not users_query:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No users found.",
-            )
+    return schemas.PaginatedUsers(
+        users=users_list, total_count=total_users, next_cursor=next_cursor  # type: ignore
+    )
 
-        users_list = [schemas.User.model_validate(user) for user in users_query]
 
-        # Get the id of the last user to be used as the cursor for the next request
-        next_cursor = users_query[-1].id if users_query else None
-        # Correctly assign the id value
+# Presigned URL so the client uploads its avatar straight to object storage
+@router.post("/user/avatar/upload-url", response_model=schemas.AvatarUploadOut)
+def get_avatar_upload_url(
+    request: schemas.AvatarUploadRequest,
+    user_data: schemas.User = Depends(oauth2.get_current_user),
+):
+    try:
+        return storage.presign_avatar_upload(user_data.id, request.content_type)
 
-        return schemas.PaginatedUsers(
-            users=users_list, total_count=total_users, next_cursor=next_cursor  # type: ignore
+    except (BotoCoreError, ClientError) as e:
+        logger.warning("Could not presign avatar upload: %s", e)
+        raise AppError(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Storage error",
+            code="storage_error",
         )
 
+
+def save_thumbnails(user_id: UUID, image_url: str, thumbnails: dict[str, str]):
+    db = SessionLocal()
+    try:
+        # Skipped if the user switched avatars while these were rendering
+        db.query(models.User).filter(
+            models.User.id == user_id, models.User.profile_img == image_url
+        ).update({"profile_thumbnails": thumbnails}, synchronize_session=False)
+        db.commit()
+        oauth2.forget_user(user_id)
+    finally:
+        db.close()
+
+
+async def generate_avatar_thumbnails(user_id: UUID, key: str):
+    # Runs after the response, where the app's error handlers can't catch it
+    try:
+        thumbnails = await storage.thumbnail_pool.render(key)
+        await run_in_threadpool(save_thumbnails, user_id, storage.object_url(key), thumbnails)
     except Exception as e:
+        logger.warning("Thumbnail generation failed for %s: %s", key, e)
+
+
+# Confirm an uploaded avatar; thumbnails are generated in the background
+@router.post("/user/avatar/complete", response_model=schemas.UserOut)
+def complete_avatar_upload(
+    avatar: schemas.AvatarComplete,
+    background_tasks: BackgroundTasks,
+    user_data: schemas.User = Depends(oauth2.get_current_user),
+    db: Session = Depends(get_db),
+):
+    if not avatar.key.startswith(storage.avatar_prefix(user_data.id)):
         raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Avatar key does not belong to this user",
+        )
+
+    try:
+        error = storage.avatar_upload_error(avatar.key)
+    except (BotoCoreError, ClientError) as e:
+        logger.warning("Could not check avatar upload %s: %s", avatar.key, e)
+        raise AppError(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"{str(e)}",
+            detail="Storage error",
+            code="storage_error",
+        )
+    if error is not None:
+        raise AppError(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=error,
+            code="invalid_avatar_upload",
+        )
+
+    # user_data may be a cached copy, so load the row to write it
+    user = db.get(models.User, user_data.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No user found",
         )
 
+    user.profile_img = storage.object_url(avatar.key)  # type: ignore
+    user.profile_thumbnails = None  # type: ignore
+    db.commit()
+    oauth2.forget_user(user.id)
+    db.refresh(user)
+
+    background_tasks.add_task(generate_avatar_thumbnails, user.id, avatar.key)
+    return schemas.UserOut(user=schemas.User.model_validate(user))
@@ -1,14 +1,19 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Annotated, Any, Dict, List, Literal, Optional
 from uuid import UUID
-from pydantic import BaseModel, ConfigDict, EmailStr
+from pydantic import AfterValidator, BaseModel, ConfigDict, EmailStr
+from app.utils import normalize_email
+
+
+# Emails are matched case-insensitively, so inputs are lowercased on the way in
+NormalizedEmail = Annotated[EmailStr, AfterValidator(normalize_email)]
 
 
 # User schema ------------------
 
 
 class UserBase(BaseModel):
-    email: EmailStr
+    email: NormalizedEmail
     password: str
 
 
@@ -26,6 +31,7 @@ class User(BaseModel):
     email: EmailStr
     name: str
     profile_img: Optional[str] = ""
+    profile_thumbnails: Optional[Dict[str, str]] = None
     user_type: Optional[str] = "email"
     created_at: datetime
 
@@ -49,7 +55,7 @@ class UserAuthOut(BaseModel):
 
 
 class ChangePassword(BaseModel):
-    email: EmailStr
+    email: NormalizedEmail
     old_password: str
     new_password: str
 
@@ -58,8 +64,23 @@ class ChangePasswordOut(BaseModel):
     success: bool
     message: str
 
+class AvatarUploadRequest(BaseModel):
+    content_type: Literal["image/jpeg", "image/png", "image/webp"]
+
+
+class AvatarUploadOut(BaseModel):
+    upload_url: str
+    key: str
+    image_url: str
+    expires_in: int
+
+
+class AvatarComplete(BaseModel):
+    key: str
+
+
 class EmailRequest(BaseModel):
-    email: EmailStr
+    email: NormalizedEmail
 
 class CodeRequest(BaseModel):
     code: str
@@ -87,6 +108,15 @@ class TaskUpdate(TaskBase):
     pass
 
 
+class TaskImport(TaskBase):
+    is_completed: Optional[bool] = False
+    created_at: Optional[datetime] = None
+
+
+class TaskImportOut(BaseModel):
+    imported: int
+
+
 class Task(BaseModel):
     id: UUID
     owner_id: str
@@ -97,10 +127,35 @@ class Task(BaseModel):
     time: str
     is_completed: Optional[bool] = False
     created_at: datetime
+    # Only set on tasks read from the archive
+    archived_at: Optional[datetime] = None
 
     model_config = {"from_attributes": True, "json_encoders": {UUID: lambda v: str(v)}}
 
 
+class TaskSearchHit(Task):
+    rank: float
+
+
+class TaskSearchOut(BaseModel):
+    tasks: List[TaskSearchHit]
+    next_offset: Optional[int]
+
+
+class TaskDayStats(BaseModel):
+    date: str
+    total: int
+    completed: int
+    pending: int
+
+
+class TaskStats(BaseModel):
+    total: int
+    completed: int
+    pending: int
+    by_date: List[TaskDayStats]
+
+
 # JWT Token schema------------------
 
 
@@ -131,7 +186,23 @@ class OtpOut(BaseModel):
 
 
 class Otp(BaseModel):
-    email: EmailStr
+    email: NormalizedEmail
+
+
+# Job schema------------------
+
+
+class JobOut(BaseModel):
+    id: UUID
+    name: str
+    status: str
+    attempts: int
+    result: Optional[Any] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Pdf schema------------------
@@ -0,0 +1,160 @@
+"""Production launcher: a gunicorn arbiter with uvicorn workers.
+
+    python -m app.server
+    python -m app.server --workers 4 --bind 0.0.0.0:8080
+    python -m app.server --print-config
+
+The app is imported once in the arbiter and workers are forked from it, so
+the imported modules are shared copy-on-write instead of being loaded
+again by every worker. Workers are sized from the CPUs this process may use
+and from how many pools fit in db_max_connections.
+"""
+import argparse
+import gc
+import math
+import os
+import random
+import shutil
+import tempfile
+from importlib.util import find_spec
+
+from gunicorn.app.base import BaseApplication
+from uvicorn.workers import UvicornWorker
+
+from app.config import settings
+
+
+# Sizing ------------------
+
+
+def available_cpus() -> int:
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not on Linux
+        cpus = os.cpu_count() or 1
+    # A container's CPU quota is usually lower than the cores it can see
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def worker_count(cpus: int) -> tuple[int, str]:
+    """Returns the worker count and what limited it."""
+    if settings.web_workers > 0:
+        return settings.web_workers, "web_workers"
+    by_cpu = max(1, int(cpus * settings.web_workers_per_cpu))
+    per_worker = settings.db_pool_size + settings.db_max_overflow
+    by_database = max(1, settings.db_max_connections // per_worker)
+    if by_database < by_cpu:
+        return by_database, f"db_max_connections ({per_worker} connections per worker)"
+    return by_cpu, f"{cpus} CPUs"
+
+
+def resolved(setting: str, package: str, fallback: str) -> str:
+    if setting != "auto":
+        return setting
+    return package if find_spec(package) else fallback
+
+
+# Workers ------------------
+
+
+class Worker(UvicornWorker):
+    CONFIG_KWARGS = {"loop": settings.server_loop, "http": settings.server_http}
+
+
+def post_fork(server, worker):
+    from app.database import engine, replica_engine
+
+    # Connections opened in the arbiter must not be shared; drop them from
+    # this worker's pools without closing the arbiter's sockets
+    engine.dispose(close=False)
+    replica_engine.dispose(close=False)
+    # Otherwise every worker draws the same backoff jitter
+    random.seed()
+
+
+def on_exit(server):
+    shutil.rmtree(settings.cache_channel_dir, ignore_errors=True)
+
+
+def per_worker_warnings(workers: int) -> list[str]:
+    if workers == 1:
+        return []
+    warnings = []
+    if settings.task_events_broker == "local":
+        warnings.append(
+            "task_events_broker=local: WebSocket events only reach clients on the same worker"
+        )
+    if settings.rate_limit_enabled and settings.rate_limit_backend == "memory":
+        warnings.append(
+            f"rate_limit_backend=memory: each worker allows the full limit ({workers}x overall)"
+        )
+    return warnings
+
+
+class Server(BaseApplication):
+    def __init__(self, options: dict):
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        from app.main import app
+
+        # Objects created by the import are now shared with the workers;
+        # freezing them keeps the collector from writing to (and so copying)
+        # their pages
+        gc.collect()
+        gc.freeze()
+        return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the DayTask API")
+    parser.add_argument("--workers", type=int, help="overrides the computed count")
+    parser.add_argument("--bind", default=settings.server_bind)
+    parser.add_argument("--print-config", action="store_true", help="show sizing and exit")
+    args = parser.parse_args()
+
+    cpus = available_cpus()
+    workers, reason = (args.workers, "--workers") if args.workers else worker_count(cpus)
+    loop = resolved(settings.server_loop, "uvloop", "asyncio")
+    http = resolved(settings.server_http, "httptools", "h11")
+    print(
+        f"{workers} workers (limited by {reason}), {settings.db_pool_size}+"
+        f"{settings.db_max_overflow} connections each, loop={loop}, http={http}, bind={args.bind}"
+    )
+    for warning in per_worker_warnings(workers):
+        print(f"warning: {warning}")
+    if args.print_config:
+        return
+
+    # Workers bind their cache invalidation sockets here (app.cache)
+    settings.cache_channel_dir = tempfile.mkdtemp(prefix="daytask-cache-")
+    Server(
+        {
+            "bind": args.bind,
+            "workers": workers,
+            "worker_class": Worker,
+            "preload_app": True,
+            # Lifespan shutdown drains for up to drain_delay + drain_timeout
+            "graceful_timeout": math.ceil(
+                settings.drain_delay_seconds + settings.drain_timeout_seconds + 5
+            ),
+            "post_fork": post_fork,
+            "on_exit": on_exit,
+        }
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import asyncio
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from math import ceil, log
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+
+from app import models
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+LOAD_BATCH_SIZE = 10_000
+# Re-read rows this far behind the watermark: transactions can commit out of order
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, ceil(-capacity * log(error_rate) / log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        bits = self.bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+
+class EmailFilter:
+    """Registered emails in a bloom filter.
+
+    A miss means the email was not registered as of the last sync, or on
+    this worker since; a hit may be a false positive and has to be confirmed
+    against the database. Every worker keeps its own copy, synced from
+    `users` every few seconds.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        sync_seconds: float,
+        enabled: bool = True,
+        authoritative: bool = False,
+    ):
+        # Disabled, it never becomes ready and every lookup goes to the database
+        self.bloom = BloomFilter(capacity, error_rate) if enabled else None
+        self.sync_seconds = sync_seconds
+        # Whether a miss can be trusted before the next sync (see config)
+        self.authoritative = authoritative
+        self.ready = False
+        self._watermark: Optional[datetime] = None
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, email: str):
+        if self.bloom is None:
+            return
+        with self._lock:
+            self.bloom.add(email.lower())
+
+    def might_exist(self, email: str) -> bool:
+        if not self.ready:
+            return True
+        return email.lower() in self.bloom
+
+    def load(self):
+        from app.database import engine
+
+        query = select(models.User.email, models.User.created_at)
+        if self._watermark is not None:
+            query = query.where(models.User.created_at > self._watermark - SYNC_OVERLAP)
+
+        watermark = self._watermark
+        with engine.connect() as connection:
+            rows = connection.execution_options(yield_per=LOAD_BATCH_SIZE).execute(query)
+            for email, created_at in rows:
+                self.add(email)
+                if watermark is None or created_at > watermark:
+                    watermark = created_at
+        self._watermark = watermark
+
+    async def startup(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def shutdown(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while not self.ready:
+            try:
+                await run_in_threadpool(self.load)
+                self.ready = True
+            except Exception as e:
+                # Lookups fall through to the database until loading succeeds
+                logger.warning("Could not load email filter: %s", e)
+                await asyncio.sleep(self.sync_seconds)
+
+        while True:
+            await asyncio.sleep(self.sync_seconds)
+            try:
+                await run_in_threadpool(self.load)
+            except Exception as e:
+                logger.warning("Could not sync email filter: %s", e)
+
+
+email_filter = EmailFilter(
+    capacity=settings.email_filter_capacity,
+    error_rate=settings.email_filter_error_rate,
+    sync_seconds=settings.email_filter_sync_seconds,
+    enabled=settings.email_filter_enabled,
+    authoritative=settings.email_filter_authoritative,
+)
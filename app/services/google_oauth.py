@@ -0,0 +1,141 @@
+import asyncio
+import importlib.util
+import logging
+import re
+import time
+from typing import Optional
+
+import httpx
+from jose import JWTError, jwt
+
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+GOOGLE_ISSUERS = {"accounts.google.com", "https://accounts.google.com"}
+DEFAULT_KEYS_MAX_AGE = 3600
+REFRESH_MARGIN = 60
+# HTTP/2 needs the optional h2 package (httpx[http2])
+HTTP2 = importlib.util.find_spec("h2") is not None
+
+
+def cache_max_age(cache_control: Optional[str]) -> int:
+    match = re.search(r"max-age=(\d+)", cache_control or "")
+    return int(match.group(1)) if match else DEFAULT_KEYS_MAX_AGE
+
+
+class GoogleOAuth:
+    """Code exchange and local ID-token verification over one pooled client."""
+
+    def __init__(self):
+        self.client: Optional[httpx.AsyncClient] = None
+        self._keys: dict[str, dict] = {}
+        self._keys_expire_at = 0.0
+        self._keys_fetched_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def startup(self):
+        self.get_client()
+        # Keys are fetched in the background so startup never waits on Google
+        self._refresh_task = asyncio.create_task(self._refresh_keys_periodically())
+
+    async def shutdown(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    def get_client(self) -> httpx.AsyncClient:
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                http2=HTTP2,
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            )
+        return self.client
+
+    # Signing keys ------------------
+
+    async def refresh_keys(self):
+        response = await self.get_client().get(settings.google_jwks_url)
+        response.raise_for_status()
+        self._keys = {key["kid"]: key for key in response.json()["keys"]}
+        now = time.monotonic()
+        self._keys_fetched_at = now
+        self._keys_expire_at = now + cache_max_age(response.headers.get("cache-control"))
+
+    async def _refresh_keys_periodically(self):
+        while True:
+            try:
+                await self.refresh_keys()
+            except httpx.HTTPError as e:
+                logger.warning("Could not refresh Google signing keys: %s", e)
+            delay = self._keys_expire_at - time.monotonic() - REFRESH_MARGIN
+            await asyncio.sleep(max(REFRESH_MARGIN, delay))
+
+    async def get_signing_key(self, kid: str) -> dict:
+        key = self._keys.get(kid)
+        now = time.monotonic()
+        expired = now >= self._keys_expire_at
+        # Unknown kid usually means Google rotated keys; refetch at most once a minute
+        if expired or (key is None and now - self._keys_fetched_at > REFRESH_MARGIN):
+            await self.refresh_keys()
+            key = self._keys.get(kid)
+        if key is None:
+            raise JWTError("Unknown Google signing key")
+        return key
+
+    # Sign-in ------------------
+
+    async def exchange_code(self, code: str) -> dict:
+        response = await self.get_client().post(
+            settings.google_token_url,
+            data={
+                "code": code,
+                "client_id": settings.google_client_id,
+                "client_secret": settings.google_client_secret,
+                "redirect_uri": settings.google_redirect_uri,
+                "grant_type": "authorization_code",
+            },
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def verify_id_token(self, id_token: str, access_token: Optional[str]) -> dict:
+        header = jwt.get_unverified_header(id_token)
+        key = await self.get_signing_key(header.get("kid", ""))
+        claims = jwt.decode(
+            id_token,
+            key,
+            algorithms=["RS256"],
+            audience=settings.google_client_id,
+            access_token=access_token,
+        )
+        if claims.get("iss") not in GOOGLE_ISSUERS:
+            raise JWTError("Invalid token issuer")
+        if not claims.get("email_verified", False):
+            raise JWTError("Google email is not verified")
+        return claims
+
+    async def fetch_userinfo(self, access_token: str) -> dict:
+        response = await self.get_client().get(
+            settings.google_userinfo_url,
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def authenticate(self, code: str) -> tuple[dict, dict]:
+        """Returns (Google token response, user claims)."""
+        tokens = await self.exchange_code(code)
+        id_token = tokens.get("id_token")
+        if id_token:
+            # Fast path: no extra round trip to Google
+            return tokens, await self.verify_id_token(id_token, tokens.get("access_token"))
+        return tokens, await self.fetch_userinfo(tokens["access_token"])
+
+
+google_oauth = GoogleOAuth()
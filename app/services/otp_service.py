@@ -5,16 +5,19 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from pydantic import EmailStr
 
+from app.jobs import job_runner
 
-def send_otp_email(receiver_email: EmailStr) -> str:
+
+def generate_otp() -> str:
+    return "".join(random.choices(string.digits, k=4))
+
+
+def send_otp_email(receiver_email: EmailStr, otp: str):
     sender_email = "furiousboy79@gmail.com"
     sender_password = "hfxh jlwz yapz aejk"
     smtp_server = "smtp.gmail.com"
     smtp_port = 587
 
-    # Generate OTP
-    otp = "".join(random.choices(string.digits, k=4))
-
     subject = "Your DayTask OTP Code"
 
     html_body = f"""
@@ -72,17 +75,24 @@ def send_otp_email(receiver_email: EmailStr) -> str:
     message["Subject"] = subject
     message.attach(MIMEText(html_body, "html"))
 
+    server = None
     try:
         server = smtplib.SMTP(smtp_server, smtp_port)
         server.starttls()
         server.login(sender_email, sender_password)
         server.sendmail(sender_email, receiver_email, message.as_string())
         print(f"OTP sent to {receiver_email}")
-        return otp
 
     except Exception as e:
         print(f"Error sending email: {str(e)}")
         raise Exception("Failed to send email")
 
     finally:
-        server.quit()  # type: ignore
+        if server is not None:
+            server.quit()
+
+
+# Sent by the job runner so /send_otp doesn't wait on SMTP; retried with backoff
+@job_runner.register("send_otp_email", max_attempts=5, concurrency=4)
+def send_otp_email_job(payload: dict):
+    send_otp_email(payload["email"], payload["otp"])
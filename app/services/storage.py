@@ -0,0 +1,151 @@
+import asyncio
+import io
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional
+
+from app.config import settings
+
+
+AVATAR_CONTENT_TYPES = {"image/jpeg": "jpg", "image/png": "png", "image/webp": "webp"}
+
+
+def s3_client(endpoint_url: Optional[str], region: str):
+    import boto3
+
+    return boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+
+
+@lru_cache
+def get_s3_client():
+    return s3_client(settings.s3_endpoint_url, settings.s3_region)
+
+
+def object_url(key: str) -> str:
+    if settings.avatar_public_base_url:
+        base = settings.avatar_public_base_url.rstrip("/")
+    elif settings.s3_endpoint_url:
+        base = f"{settings.s3_endpoint_url.rstrip('/')}/{settings.avatar_bucket}"
+    else:
+        base = f"https://{settings.avatar_bucket}.s3.{settings.s3_region}.amazonaws.com"
+    return f"{base}/{key}"
+
+
+def avatar_prefix(user_id) -> str:
+    return f"avatars/{user_id}/"
+
+
+def presign_avatar_upload(user_id, content_type: str) -> dict:
+    # Signing happens locally, no request to S3
+    key = f"{avatar_prefix(user_id)}{uuid.uuid4().hex}.{AVATAR_CONTENT_TYPES[content_type]}"
+    upload_url = get_s3_client().generate_presigned_url(
+        "put_object",
+        Params={"Bucket": settings.avatar_bucket, "Key": key, "ContentType": content_type},
+        ExpiresIn=settings.avatar_upload_expires,
+    )
+    return {
+        "upload_url": upload_url,
+        "key": key,
+        "image_url": object_url(key),
+        "expires_in": settings.avatar_upload_expires,
+    }
+
+
+def avatar_upload_error(key: str) -> Optional[str]:
+    """Why the uploaded object can't be used as an avatar, or None if it can.
+
+    A presigned PUT doesn't bound the size, so it is checked here, and an
+    object that is rejected is deleted.
+    """
+    from botocore.exceptions import ClientError
+
+    client = get_s3_client()
+    try:
+        head = client.head_object(Bucket=settings.avatar_bucket, Key=key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return "Avatar was not uploaded"
+        raise
+
+    extension = key.rsplit(".", 1)[-1]
+    if AVATAR_CONTENT_TYPES.get(head.get("ContentType", "")) != extension:
+        error = "Avatar content type does not match the upload URL"
+    elif head["ContentLength"] > settings.avatar_max_bytes:
+        error = f"Avatar is larger than {settings.avatar_max_bytes} bytes"
+    else:
+        return None
+    client.delete_object(Bucket=settings.avatar_bucket, Key=key)
+    return error
+
+
+# Thumbnails ------------------
+# render_thumbnails runs in a worker process, so it only takes picklable
+# arguments and builds its own S3 client.
+
+_worker_client = None
+
+
+def render_thumbnails(
+    bucket: str,
+    key: str,
+    sizes: list[int],
+    endpoint_url: Optional[str],
+    region: str,
+) -> dict[str, str]:
+    from PIL import Image, ImageOps
+
+    global _worker_client
+    if _worker_client is None:
+        _worker_client = s3_client(endpoint_url, region)
+
+    original = _worker_client.get_object(Bucket=bucket, Key=key)["Body"].read()
+    image = Image.open(io.BytesIO(original))
+    image = ImageOps.exif_transpose(image).convert("RGB")
+
+    base = key.rsplit(".", 1)[0]
+    keys = {}
+    for size in sizes:
+        thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, "WEBP", quality=80)
+        thumbnail_key = f"{base}_{size}.webp"
+        _worker_client.put_object(
+            Bucket=bucket,
+            Key=thumbnail_key,
+            Body=buffer.getvalue(),
+            ContentType="image/webp",
+            CacheControl="public, max-age=31536000, immutable",
+        )
+        keys[str(size)] = thumbnail_key
+    return keys
+
+
+class ThumbnailPool:
+    """Process pool for image resizing, kept off the event loop and the GIL."""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    async def render(self, key: str) -> dict[str, str]:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        keys = await asyncio.get_running_loop().run_in_executor(
+            self._executor,
+            render_thumbnails,
+            settings.avatar_bucket,
+            key,
+            settings.thumbnail_sizes,
+            settings.s3_endpoint_url,
+            settings.s3_region,
+        )
+        return {size: object_url(thumbnail_key) for size, thumbnail_key in keys.items()}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+thumbnail_pool = ThumbnailPool(workers=settings.thumbnail_workers)
@@ -0,0 +1,139 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.orm import Session
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+from app.jobs import job_runner
+from app.services.task_events import hub
+from app.services.task_search import inverted_index
+
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCHES_PER_RUN = 100
+COLUMNS = [
+    "id",
+    "owner_id",
+    "title",
+    "details",
+    "team_members",
+    "time",
+    "date",
+    "is_completed",
+    "created_at",
+]
+
+
+# Moving ------------------
+# Completed tasks older than archive_after_days leave the hot tasks table, a
+# bounded batch per transaction. Counters in task_stats are unchanged: the
+# tasks still exist, just in archived_tasks.
+
+
+def archive_batch(db: Session, cutoff: datetime, batch_size: int) -> list[str]:
+    """Moves one batch; returns the owner of each moved task."""
+    tasks = models.Task.__table__
+    rows = db.execute(
+        select(*(tasks.c[column] for column in COLUMNS))
+        .where(
+            tasks.c.is_completed.is_(True),
+            tasks.c.created_at < cutoff,
+            tasks.c.deleted_at.is_(None),
+        )
+        .order_by(tasks.c.created_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not rows:
+        return []
+
+    db.execute(
+        insert(models.ArchivedTask),
+        [dict(zip(COLUMNS, row)) for row in rows],
+    )
+    db.execute(delete(tasks).where(tasks.c.id.in_([row.id for row in rows])))
+    db.commit()
+    return [row.owner_id for row in rows]
+
+
+def archive_completed(
+    cutoff: datetime, batch_size: int, max_batches: int = MAX_BATCHES_PER_RUN
+) -> int:
+    """Archives up to max_batches batches; the next run picks up the rest."""
+    owners: set[str] = set()
+    moved = 0
+    with SessionLocal() as db:
+        for _ in range(max_batches):
+            batch_owners = archive_batch(db, cutoff, batch_size)
+            owners.update(batch_owners)
+            moved += len(batch_owners)
+            if len(batch_owners) < batch_size:
+                break
+
+    for owner_id in owners:
+        inverted_index.invalidate(owner_id)
+    if owners:
+        # Open task lists drop the archived tasks on refetch
+        hub.resync(owners)
+    return moved
+
+
+@job_runner.register(
+    "archive_tasks", max_attempts=1, concurrency=1, every=settings.archive_interval_seconds
+)
+def archive_tasks_job(payload: dict) -> dict:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.archive_after_days)
+    archived = archive_completed(cutoff, settings.archive_batch_size)
+    logger.info("Archived %d completed tasks", archived)
+    return {"archived": archived}
+
+
+# Restoring ------------------
+
+
+def restore(db: Session, task_id: UUID) -> bool:
+    """Moves an archived task back to tasks in the caller's transaction.
+
+    Lets the task router edit and delete archived tasks like any other; the
+    next run archives it again if it is still completed.
+    """
+    archived = models.ArchivedTask.__table__
+    row = db.execute(
+        select(*(archived.c[column] for column in COLUMNS))
+        .where(archived.c.id == task_id)
+        .with_for_update()
+    ).first()
+    if row is None:
+        return False
+
+    db.execute(insert(models.Task), [dict(zip(COLUMNS, row))])
+    db.execute(delete(archived).where(archived.c.id == task_id))
+    return True
+
+
+# Reading ------------------
+
+
+def archived_tasks(
+    db: Session,
+    owner_id: str,
+    limit: int,
+    before: Optional[datetime] = None,
+    before_id: Optional[UUID] = None,
+) -> list[models.ArchivedTask]:
+    """Newest first; pass the last created_at and id as `before` and `before_id`."""
+    archived = models.ArchivedTask
+    query = select(archived).where(archived.owner_id == owner_id)
+    # Tasks archived in one batch can share a created_at; the id keeps pages from overlapping
+    if before is not None and before_id is not None:
+        query = query.where(tuple_(archived.created_at, archived.id) < tuple_(before, before_id))
+    elif before is not None:
+        query = query.where(archived.created_at < before)
+    query = query.order_by(archived.created_at.desc(), archived.id.desc()).limit(limit)
+    return list(db.scalars(query))
@@ -0,0 +1,181 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+from collections import defaultdict
+from typing import Callable, Iterable, Optional
+
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 100
+PG_CHANNEL = "task_events"
+
+
+# Brokers ------------------
+# A broker moves events between workers. The hub publishes every event to the
+# broker and the broker hands it back (possibly on another worker) for fan-out.
+
+
+class LocalBroker:
+    """Single-process stand-in: events are delivered straight back to this worker."""
+
+    def __init__(self):
+        self._handler: Optional[Callable[[dict], None]] = None
+
+    def start(self, handler: Callable[[dict], None]):
+        self._handler = handler
+
+    def publish(self, event: dict):
+        if self._handler is not None:
+            self._handler(event)
+
+    def stop(self):
+        self._handler = None
+
+
+class PostgresBroker:
+    """Cross-worker broker using Postgres LISTEN/NOTIFY on the existing database."""
+
+    def __init__(self, engine, channel: str = PG_CHANNEL):
+        self.engine = engine
+        self.channel = channel
+        self._handler: Optional[Callable[[dict], None]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self, handler: Callable[[dict], None]):
+        self._handler = handler
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._listen, daemon=True)
+            self._thread.start()
+
+    def publish(self, event: dict):
+        with self.engine.connect() as connection:
+            connection.exec_driver_sql(
+                "SELECT pg_notify(%s, %s)", (self.channel, json.dumps(event))
+            )
+            connection.commit()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread = None
+
+    def _listen(self):
+        connection = self.engine.raw_connection()
+        try:
+            dbapi_connection = connection.driver_connection
+            dbapi_connection.autocommit = True
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"LISTEN {self.channel}")
+            while not self._stopped.is_set():
+                if select.select([dbapi_connection], [], [], 1.0) == ([], [], []):
+                    continue
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    notify = dbapi_connection.notifies.pop(0)
+                    if self._handler is not None:
+                        self._handler(json.loads(notify.payload))
+        finally:
+            connection.close()
+
+
+# Hub ------------------
+
+
+class Subscription:
+    def __init__(self, keys: Iterable[str]):
+        self.keys = tuple(keys)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def put(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Slow client: drop what it has not read yet and ask it to refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "resync"})
+
+
+class TaskEventHub:
+    """Fans task events out to the WebSocket connections of this worker."""
+
+    def __init__(self, broker=None):
+        self.broker = broker or LocalBroker()
+        self._subscribers: dict[str, set[Subscription]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, keys: Iterable[str]) -> Subscription:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+            self.broker.start(self._receive)
+
+        subscription = Subscription(keys)
+        for key in subscription.keys:
+            self._subscribers[key].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        for key in subscription.keys:
+            subscribers = self._subscribers.get(key)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[key]
+
+    def publish(self, event_type: str, task: dict):
+        # Only the id: clients refetch, and events stay well under the
+        # 8000 byte NOTIFY limit however large the task is
+        audience = [task["owner_id"], *(task.get("team_members") or [])]
+        event = {"type": f"task.{event_type}", "audience": audience, "task": {"id": task["id"]}}
+        self._send(event)
+
+    def resync(self, audience: Iterable[str]):
+        # After bulk changes: clients refetch instead of getting one event per task
+        self._send({"type": "resync", "audience": list(audience), "task": None})
+
+    def _send(self, event: dict):
+        # Called after the change is committed; a lost event must not fail the request
+        try:
+            self.broker.publish(event)
+        except Exception as e:
+            logger.warning("Could not publish %s event: %s", event["type"], e)
+
+    def _receive(self, event: dict):
+        # Brokers call this from request threads or their listener thread
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self.dispatch, event)
+
+    def dispatch(self, event: dict):
+        delivered: set[Subscription] = set()
+        message = {"type": event["type"], "task": event["task"]}
+        for key in event["audience"]:
+            for subscription in self._subscribers.get(key, ()):
+                if subscription in delivered:
+                    continue
+                delivered.add(subscription)
+                subscription.put(message)
+        return len(delivered)
+
+    def close(self):
+        self.broker.stop()
+        self._loop = None
+
+
+def create_broker():
+    if settings.task_events_broker == "postgres":
+        from app.database import engine
+
+        return PostgresBroker(engine)
+    return LocalBroker()
+
+
+hub = TaskEventHub(create_broker())
@@ -0,0 +1,94 @@
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, select
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+from app.jobs import job_runner
+
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCHES_PER_RUN = 500
+
+
+# Hard-deletes soft-deleted tasks once they are older than purge_after_hours,
+# in bounded batches with a pause between them, and only inside the
+# configured off-peak window.
+
+
+def parse_window(window: str) -> Optional[tuple[int, int]]:
+    """"02:00-05:00" -> (120, 300) in minutes of the UTC day; "" -> None."""
+    if not window:
+        return None
+    start, end = (part.strip().split(":") for part in window.split("-"))
+    return int(start[0]) * 60 + int(start[1]), int(end[0]) * 60 + int(end[1])
+
+
+def in_window(now: datetime, window: Optional[tuple[int, int]]) -> bool:
+    if window is None:
+        return True
+    start, end = window
+    minute = now.hour * 60 + now.minute
+    if start <= end:
+        return start <= minute < end
+    # Wraps past midnight, e.g. 23:00-04:00
+    return minute >= start or minute < end
+
+
+def purge_batch(cutoff: datetime, batch_size: int) -> int:
+    tasks = models.Task.__table__
+    with SessionLocal() as db:
+        ids = db.scalars(
+            select(tasks.c.id)
+            .where(tasks.c.deleted_at < cutoff)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        if ids:
+            db.execute(delete(tasks).where(tasks.c.id.in_(ids)))
+            db.commit()
+    return len(ids)
+
+
+def purge_deleted(
+    cutoff: datetime,
+    batch_size: int,
+    pause_seconds: float = 0,
+    window: Optional[tuple[int, int]] = None,
+    max_batches: int = MAX_BATCHES_PER_RUN,
+) -> int:
+    purged = 0
+    for _ in range(max_batches):
+        # Stop as soon as the window closes, even mid-run
+        if not in_window(datetime.now(timezone.utc), window):
+            break
+        count = purge_batch(cutoff, batch_size)
+        purged += count
+        if count < batch_size:
+            break
+        time.sleep(pause_seconds)
+    return purged
+
+
+@job_runner.register(
+    "purge_deleted_tasks", max_attempts=1, concurrency=1, every=settings.purge_interval_seconds
+)
+def purge_deleted_tasks_job(payload: dict) -> dict:
+    now = datetime.now(timezone.utc)
+    window = parse_window(settings.purge_window)
+    if not in_window(now, window):
+        return {"purged": 0, "skipped": "outside purge window"}
+
+    purged = purge_deleted(
+        now - timedelta(hours=settings.purge_after_hours),
+        settings.purge_batch_size,
+        settings.purge_batch_pause_seconds,
+        window,
+    )
+    logger.info("Purged %d deleted tasks", purged)
+    return {"purged": purged}
@@ -0,0 +1,148 @@
+import difflib
+import re
+from collections import defaultdict
+
+from sqlalchemy import Row, func, literal_column, or_, select
+from sqlalchemy.orm import Session
+
+from app import cache, models
+from app.config import settings
+
+
+TOKEN = re.compile(r"\w+")
+TITLE_WEIGHT = 2.0
+FUZZY_CUTOFF = 0.8
+SEARCH_INDEX_CACHE = "search_index"
+# What the router returns; rows of these, not ORM objects, are kept in the index
+TASK_COLUMNS = [
+    "id",
+    "owner_id",
+    "title",
+    "details",
+    "team_members",
+    "date",
+    "time",
+    "is_completed",
+    "created_at",
+]
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN.findall(text.lower())
+
+
+# Postgres ------------------
+# tasks.search_vector is a generated tsvector column with a GIN index, and
+# tasks.title has a trigram index (see the full-text search migration).
+
+
+def search_postgres(db: Session, owner_id: str, q: str, limit: int, offset: int):
+    search_vector = literal_column("tasks.search_vector")
+    tsquery = func.websearch_to_tsquery("english", q)
+    prefix = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    rank = func.greatest(
+        func.ts_rank_cd(search_vector, tsquery),
+        func.similarity(models.Task.title, q),
+    )
+    stmt = (
+        select(models.Task, rank.label("rank"))
+        .where(
+            models.Task.owner_id == owner_id,
+            models.Task.deleted_at.is_(None),
+            or_(
+                search_vector.bool_op("@@")(tsquery),
+                models.Task.title.bool_op("%")(q),  # trigram match, tolerates typos
+                models.Task.title.ilike(prefix),
+            ),
+        )
+        .order_by(rank.desc(), models.Task.created_at.desc())
+        .limit(limit)
+        .offset(offset)
+    )
+    return [(task, float(rank)) for task, rank in db.execute(stmt)]
+
+
+# In-process fallback ------------------
+# Used when the database has no full-text search (SQLite test runs). One
+# inverted index per owner, built on first search and dropped on writes, in
+# a bounded cache so owners who stop searching age out.
+
+
+class OwnerIndex:
+    def __init__(self, tasks: list[Row]):
+        self.tasks = {task.id: task for task in tasks}
+        # term -> {task id: weighted term frequency}
+        self.postings: dict[str, dict] = defaultdict(lambda: defaultdict(float))
+        for task in tasks:
+            for term in tokenize(task.title):  # type: ignore
+                self.postings[term][task.id] += TITLE_WEIGHT
+            for term in tokenize(task.details):  # type: ignore
+                self.postings[term][task.id] += 1.0
+
+    def matches(self, term: str, is_last: bool) -> dict:
+        candidates = [term] if term in self.postings else []
+        if is_last:
+            # The last word may still be being typed
+            candidates += [t for t in self.postings if t != term and t.startswith(term)]
+        if not candidates:
+            candidates = difflib.get_close_matches(term, self.postings.keys(), n=3, cutoff=FUZZY_CUTOFF)
+
+        scores: dict = defaultdict(float)
+        for candidate in candidates:
+            exact = 1.0 if candidate == term else 0.5
+            for task_id, weight in self.postings[candidate].items():
+                scores[task_id] += weight * exact
+        return scores
+
+    def search(self, q: str) -> list[tuple[Row, float]]:
+        terms = tokenize(q)
+        if not terms:
+            return []
+
+        # Every term has to match, like websearch_to_tsquery
+        totals = None
+        for i, term in enumerate(terms):
+            scores = self.matches(term, is_last=i == len(terms) - 1)
+            if totals is None:
+                totals = dict(scores)
+            else:
+                totals = {k: totals[k] + scores[k] for k in totals.keys() & scores.keys()}
+            if not totals:
+                return []
+
+        hits = [(self.tasks[task_id], score) for task_id, score in totals.items()]  # type: ignore
+        hits.sort(key=lambda hit: (hit[1], hit[0].created_at), reverse=True)
+        return hits
+
+
+class InvertedIndex:
+    def __init__(self, max_owners: int, ttl: float):
+        self._owners = cache.register(SEARCH_INDEX_CACHE, max_owners, ttl)
+
+    def invalidate(self, owner_id: str):
+        # On every worker, so none keeps searching the old tasks
+        cache.invalidate(SEARCH_INDEX_CACHE, owner_id)
+
+    def search(self, db: Session, owner_id: str, q: str, limit: int, offset: int):
+        index = self._owners.get(owner_id)
+        if index is None:
+            tasks = models.Task.__table__
+            rows = db.execute(
+                select(*(tasks.c[column] for column in TASK_COLUMNS)).where(
+                    tasks.c.owner_id == owner_id, tasks.c.deleted_at.is_(None)
+                )
+            ).all()
+            index = OwnerIndex(rows)
+            self._owners.put(owner_id, index)
+        return index.search(q)[offset : offset + limit]
+
+
+inverted_index = InvertedIndex(
+    max_owners=settings.search_index_max_owners, ttl=settings.search_index_seconds
+)
+
+
+def search_tasks(db: Session, owner_id: str, q: str, limit: int, offset: int):
+    if db.get_bind().dialect.name == "postgresql":
+        return search_postgres(db, owner_id, q, limit, offset)
+    return inverted_index.search(db, owner_id, q, limit, offset)
@@ -0,0 +1,216 @@
+import argparse
+from collections import defaultdict
+
+from sqlalchemy import case, delete, func, insert, select, text, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app import models
+
+
+# Incremental updates ------------------
+# Every task write adds its delta to task_stats (one row per owner) and
+# task_daily_stats (one row per owner and date) in the same transaction.
+
+
+def _counts(task) -> tuple[str, str, int]:
+    return task.owner_id, task.date, 1 if task.is_completed else 0
+
+
+def _apply(db: Session, owner_id: str, date: str, total: int, completed: int):
+    if not total and not completed:
+        return
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    for model, keys in (
+        (models.TaskStat, {"owner_id": owner_id}),
+        (models.TaskDailyStat, {"owner_id": owner_id, "date": date}),
+    ):
+        table = model.__table__
+        stmt = insert(table).values(**keys, total=total, completed=completed)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={
+                "total": table.c.total + stmt.excluded.total,
+                "completed": table.c.completed + stmt.excluded.completed,
+            },
+        )
+        db.execute(stmt)
+
+
+def record_created(db: Session, task):
+    owner_id, date, completed = _counts(task)
+    _apply(db, owner_id, date, 1, completed)
+
+
+def record_deleted(db: Session, task):
+    owner_id, date, completed = _counts(task)
+    _apply(db, owner_id, date, -1, -completed)
+
+
+def record_bulk(db: Session, owner_id: str, counts: dict):
+    """Adds {date: (total, completed)} for a batch of new tasks."""
+    for date, (total, completed) in counts.items():
+        _apply(db, owner_id, date, total, completed)
+
+
+def snapshot(task) -> tuple[str, str, int]:
+    """What a task counts towards, taken before it is updated."""
+    return _counts(task)
+
+
+def record_updated(db: Session, before: tuple[str, str, int], task):
+    after = _counts(task)
+    if before == after:
+        return
+    owner_id, date, completed = before
+    _apply(db, owner_id, date, -1, -completed)
+    owner_id, date, completed = after
+    _apply(db, owner_id, date, 1, completed)
+
+
+# Reads ------------------
+
+
+def get_stats(db: Session, owner_id: str) -> dict:
+    totals = db.get(models.TaskStat, owner_id)
+    days = db.execute(
+        select(
+            models.TaskDailyStat.date,
+            models.TaskDailyStat.total,
+            models.TaskDailyStat.completed,
+        )
+        .where(
+            models.TaskDailyStat.owner_id == owner_id,
+            models.TaskDailyStat.total > 0,
+        )
+        .order_by(models.TaskDailyStat.date)
+    ).all()
+    total = totals.total if totals else 0
+    completed = totals.completed if totals else 0
+    return {
+        "total": total,
+        "completed": completed,
+        "pending": total - completed,
+        "by_date": [
+            {
+                "date": date,
+                "total": day_total,
+                "completed": day_completed,
+                "pending": day_total - day_completed,
+            }
+            for date, day_total, day_completed in days
+        ],
+    }
+
+
+# Consistency checks ------------------
+
+
+def _aggregate(owner_ids=None):
+    # Archived tasks still count, so both tables are summed
+    parts = []
+    for model in (models.Task, models.ArchivedTask):
+        part = select(model.owner_id, model.date, model.is_completed)
+        if model is models.Task:
+            part = part.where(model.deleted_at.is_(None))
+        if owner_ids is not None:
+            part = part.where(model.owner_id.in_(owner_ids))
+        parts.append(part)
+    tasks = union_all(*parts).subquery()
+
+    completed = func.sum(case((tasks.c.is_completed.is_(True), 1), else_=0))
+    return select(tasks.c.owner_id, tasks.c.date, func.count(), completed).group_by(
+        tasks.c.owner_id, tasks.c.date
+    )
+
+
+def check(db: Session, owner_ids=None) -> list[str]:
+    """Owners whose counters no longer match their tasks."""
+    expected: dict[str, dict] = defaultdict(dict)
+    for owner_id, date, total, completed in db.execute(_aggregate(owner_ids)):
+        expected[owner_id][date] = (total, completed)
+
+    stored_days: dict[str, dict] = defaultdict(dict)
+    query = select(
+        models.TaskDailyStat.owner_id,
+        models.TaskDailyStat.date,
+        models.TaskDailyStat.total,
+        models.TaskDailyStat.completed,
+    ).where(models.TaskDailyStat.total != 0)
+    if owner_ids is not None:
+        query = query.where(models.TaskDailyStat.owner_id.in_(owner_ids))
+    for owner_id, date, total, completed in db.execute(query):
+        stored_days[owner_id][date] = (total, completed)
+
+    stored: dict[str, tuple] = {}
+    query = select(models.TaskStat.owner_id, models.TaskStat.total, models.TaskStat.completed)
+    if owner_ids is not None:
+        query = query.where(models.TaskStat.owner_id.in_(owner_ids))
+    for owner_id, total, completed in db.execute(query):
+        if total or completed:
+            stored[owner_id] = (total, completed)
+
+    drifted = set()
+    for owner_id in expected.keys() | stored_days.keys() | stored.keys():
+        days = expected.get(owner_id, {})
+        totals = (
+            (sum(t for t, _ in days.values()), sum(c for _, c in days.values()))
+            if days
+            else None
+        )
+        if days != stored_days.get(owner_id, {}) or totals != stored.get(owner_id):
+            drifted.add(owner_id)
+    return sorted(drifted)
+
+
+def rebuild(db: Session, owner_ids=None):
+    """Recompute counters from the tasks table in bulk, for everyone or some owners."""
+    if db.get_bind().dialect.name == "postgresql":
+        # Hold off task writes so no delta lands between the delete and the insert
+        db.execute(text("LOCK TABLE tasks IN SHARE MODE"))
+
+    daily = models.TaskDailyStat.__table__
+    totals = models.TaskStat.__table__
+    clear_daily, clear_totals = delete(daily), delete(totals)
+    if owner_ids is not None:
+        clear_daily = clear_daily.where(daily.c.owner_id.in_(owner_ids))
+        clear_totals = clear_totals.where(totals.c.owner_id.in_(owner_ids))
+    db.execute(clear_daily)
+    db.execute(clear_totals)
+
+    db.execute(
+        insert(daily).from_select(
+            ["owner_id", "date", "total", "completed"], _aggregate(owner_ids)
+        )
+    )
+    summed = select(
+        daily.c.owner_id, func.sum(daily.c.total), func.sum(daily.c.completed)
+    ).group_by(daily.c.owner_id)
+    if owner_ids is not None:
+        summed = summed.where(daily.c.owner_id.in_(owner_ids))
+    db.execute(insert(totals).from_select(["owner_id", "total", "completed"], summed))
+    db.commit()
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Check or rebuild task counters")
+    parser.add_argument("command", choices=["check", "rebuild"])
+    parser.add_argument("--owner", action="append", help="limit to these owner ids")
+    parser.add_argument("--fix", action="store_true", help="rebuild drifted owners")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        if args.command == "rebuild":
+            rebuild(db, args.owner)
+            print("Rebuilt task counters")
+        else:
+            drifted = check(db, args.owner)
+            print(f"{len(drifted)} owners with drifted counters")
+            for owner_id in drifted:
+                print(owner_id)
+            if drifted and args.fix:
+                rebuild(db, drifted)
+                print("Rebuilt drifted owners")
@@ -0,0 +1,277 @@
+import csv
+import io
+import json
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+from time import monotonic
+from typing import Iterable, Iterator, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.services import task_stats
+
+
+EXPORT_BATCH_SIZE = 1_000
+IMPORT_BATCH_SIZE = 5_000
+MAX_LINE_LENGTH = 64 * 1024
+# One import is one transaction; these bound how long and how much it holds
+MAX_IMPORT_LINES = 100_000
+MAX_IMPORT_SIZE = 64 * 1024 * 1024  # characters
+MAX_IMPORT_SECONDS = 120
+
+FIELDS = ["id", "title", "details", "team_members", "date", "time", "is_completed", "created_at"]
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+class ImportRowError(ValueError):
+    def __init__(self, line: int, message: str):
+        super().__init__(f"Line {line}: {message}")
+        self.line = line
+
+
+# Export ------------------
+
+
+def _export_row(row) -> dict:
+    return {
+        "id": str(row.id),
+        "title": row.title,
+        "details": row.details,
+        "team_members": row.team_members or [],
+        "date": row.date,
+        "time": row.time,
+        "is_completed": bool(row.is_completed),
+        "created_at": row.created_at.isoformat(),
+    }
+
+
+def _encode_ndjson(rows) -> str:
+    return "".join(json.dumps(_export_row(row)) + "\n" for row in rows)
+
+
+def _encode_csv(rows) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        item = _export_row(row)
+        item["team_members"] = json.dumps(item["team_members"])
+        writer.writerow(item[field] for field in FIELDS)
+    return buffer.getvalue()
+
+
+def export_tasks(
+    engine, owner_id: str, fmt: str, include_archived: bool = False
+) -> Iterator[bytes]:
+    """Streams one owner's tasks, a batch of rows per chunk; archived ones last.
+
+    Runs on its own connection since the request's session is closed
+    before the response body is sent.
+    """
+    encode = _encode_csv if fmt == "csv" else _encode_ndjson
+    if fmt == "csv":
+        yield (",".join(FIELDS) + "\r\n").encode()
+
+    sources = [models.Task, models.ArchivedTask] if include_archived else [models.Task]
+    with engine.connect() as connection:
+        for model in sources:
+            query = (
+                select(*(getattr(model, field) for field in FIELDS))
+                .where(model.owner_id == owner_id)
+                .order_by(model.created_at)
+            )
+            if model is models.Task:
+                query = query.where(model.deleted_at.is_(None))
+            # yield_per streams through a server-side cursor, so memory stays flat
+            result = connection.execution_options(yield_per=EXPORT_BATCH_SIZE).execute(query)
+            for rows in result.partitions():
+                yield encode(rows).encode()
+
+
+# Import ------------------
+
+
+class ChunkReader(io.RawIOBase):
+    """File-like view over an iterable of byte chunks (a streamed upload)."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._pending = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self._pending:
+            try:
+                self._pending = next(self._chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+def _text_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    reader = io.TextIOWrapper(io.BufferedReader(ChunkReader(chunks)), encoding="utf-8", newline="")
+    deadline = monotonic() + MAX_IMPORT_SECONDS
+    number = 0
+    size = 0
+    while True:
+        try:
+            line = reader.readline(MAX_LINE_LENGTH + 1)
+        except UnicodeDecodeError:
+            raise ImportRowError(number + 1, "not valid UTF-8")
+        if not line:
+            return
+        number += 1
+        size += len(line)
+        if len(line) > MAX_LINE_LENGTH:
+            raise ImportRowError(number, f"longer than {MAX_LINE_LENGTH} characters")
+        if number > MAX_IMPORT_LINES:
+            raise ImportRowError(number, f"imports are limited to {MAX_IMPORT_LINES} lines")
+        if size > MAX_IMPORT_SIZE:
+            raise ImportRowError(number, f"imports are limited to {MAX_IMPORT_SIZE} characters")
+        if monotonic() > deadline:
+            raise ImportRowError(number, f"upload took longer than {MAX_IMPORT_SECONDS} seconds")
+        yield line
+
+
+def _parse_ndjson(lines: Iterator[str]) -> Iterator[tuple[int, dict]]:
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ImportRowError(number, f"invalid JSON: {e.msg}")
+
+
+def _parse_csv(lines: Iterator[str]) -> Iterator[tuple[int, dict]]:
+    reader = csv.DictReader(lines)
+    while True:
+        try:
+            item = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            raise ImportRowError(reader.line_num, f"invalid CSV: {e}")
+        number = reader.line_num
+        if item.get("team_members"):
+            try:
+                item["team_members"] = json.loads(item["team_members"])
+            except json.JSONDecodeError:
+                raise ImportRowError(number, "team_members must be a JSON list")
+        for field in ("team_members", "is_completed", "created_at"):
+            if item.get(field) == "":
+                del item[field]
+        yield number, item
+
+
+def _validated_rows(
+    items: Iterator[tuple[int, dict]], owner_id: str
+) -> Iterator[dict]:
+    now = datetime.now(timezone.utc)
+    for number, item in items:
+        try:
+            task = schemas.TaskImport.model_validate(item)
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = ".".join(str(part) for part in error["loc"])
+            raise ImportRowError(number, f"{field}: {error['msg']}")
+        # Imported tasks always get fresh ids and belong to the importer
+        yield {
+            "id": uuid.uuid4(),
+            "owner_id": owner_id,
+            "title": task.title,
+            "details": task.details,
+            "team_members": task.team_members or [],
+            "time": task.time,
+            "date": task.date,
+            "is_completed": bool(task.is_completed),
+            "created_at": task.created_at or now,
+        }
+
+
+def _pg_array(values: list[str]) -> str:
+    quoted = ('"' + v.replace("\\", "\\\\").replace('"', '\\"') + '"' for v in values)
+    return "{" + ",".join(quoted) + "}"
+
+
+def _copy_batch(db: Session, batch: list[dict]):
+    """COPY ... FROM STDIN through psycopg2, the fastest way into Postgres."""
+    buffer = io.StringIO()
+    # COPY reads an unquoted empty field as NULL; quoted, it is an empty string
+    writer = csv.writer(buffer, quoting=csv.QUOTE_ALL)
+    for row in batch:
+        writer.writerow(
+            (
+                row["id"],
+                row["owner_id"],
+                row["title"],
+                row["details"],
+                _pg_array(row["team_members"]),
+                row["time"],
+                row["date"],
+                "t" if row["is_completed"] else "f",
+                row["created_at"].isoformat(),
+            )
+        )
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            "COPY tasks (id, owner_id, title, details, team_members, time, date, "
+            "is_completed, created_at) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def _insert_batch(db: Session, batch: list[dict]):
+    # executemany; SQLAlchemy batches it into multi-row INSERTs
+    db.execute(insert(models.Task), batch)
+
+
+def import_tasks(
+    db: Session, owner_id: str, fmt: str, chunks: Iterable[bytes], batch_size: Optional[int] = None
+) -> int:
+    """Inserts tasks from a streamed NDJSON or CSV upload in one transaction.
+
+    Raises ImportRowError on the first bad row; nothing is committed then.
+    """
+    batch_size = batch_size or IMPORT_BATCH_SIZE
+    bind = db.get_bind()
+    write_batch = _copy_batch if bind.dialect.driver == "psycopg2" else _insert_batch
+
+    lines = _text_lines(chunks)
+    items = _parse_csv(lines) if fmt == "csv" else _parse_ndjson(lines)
+
+    counts: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+    imported = 0
+    batch: list[dict] = []
+    try:
+        for row in _validated_rows(items, owner_id):
+            batch.append(row)
+            day = counts[row["date"]]
+            day[0] += 1
+            day[1] += 1 if row["is_completed"] else 0
+            if len(batch) >= batch_size:
+                write_batch(db, batch)
+                imported += len(batch)
+                batch = []
+        if batch:
+            write_batch(db, batch)
+            imported += len(batch)
+
+        task_stats.record_bulk(db, owner_id, counts)
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    return imported
@@ -0,0 +1,95 @@
+"""Accounts whose emails differ only by case or whitespace.
+
+Migration 8b4e2f6a1c37 (case-insensitive email index) refuses to run while
+any exist. List them, review, then merge:
+
+    python -m app.services.user_dedupe list
+    python -m app.services.user_dedupe merge
+
+Merging keeps the oldest account of each group, moves the others' tasks to
+it and deletes them, after copying their rows to users_merged. Postgres
+only, like the migration; it touches only tables that exist at that revision.
+"""
+import argparse
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+
+# Oldest account wins
+DUPLICATES = """
+    SELECT id, keep_id FROM (
+        SELECT id, first_value(id) OVER (
+            PARTITION BY lower(trim(email)) ORDER BY created_at, id
+        ) AS keep_id
+        FROM users
+    ) ranked
+    WHERE id <> keep_id
+"""
+
+
+def conflicts(connection: Connection) -> list[tuple[str, list[str]]]:
+    """Each shared email with its accounts' stored emails, oldest first."""
+    rows = connection.execute(
+        text(
+            """
+            SELECT lower(trim(email)), array_agg(email ORDER BY created_at, id)
+            FROM users
+            GROUP BY lower(trim(email))
+            HAVING count(*) > 1
+            ORDER BY 1
+            """
+        )
+    ).all()
+    return [(email, list(emails)) for email, emails in rows]
+
+
+def merge(connection: Connection) -> int:
+    """Merges every group into its oldest account; returns the accounts removed."""
+    connection.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS users_merged AS
+            SELECT users.*, users.id AS merged_into, now() AS merged_at FROM users
+            WITH NO DATA
+            """
+        )
+    )
+    connection.execute(
+        text(
+            f"""
+            INSERT INTO users_merged
+            SELECT users.*, dup.keep_id, now()
+            FROM users JOIN ({DUPLICATES}) dup ON users.id = dup.id
+            """
+        )
+    )
+    connection.execute(
+        text(
+            f"""
+            UPDATE tasks SET owner_id = dup.keep_id::text
+            FROM ({DUPLICATES}) dup
+            WHERE tasks.owner_id = dup.id::text
+            """
+        )
+    )
+    removed = connection.execute(
+        text(f"DELETE FROM users WHERE id IN (SELECT id FROM ({DUPLICATES}) dup)")
+    )
+    return removed.rowcount
+
+
+if __name__ == "__main__":
+    from app.database import engine
+
+    parser = argparse.ArgumentParser(description="List or merge accounts with duplicate emails")
+    parser.add_argument("command", choices=["list", "merge"])
+    args = parser.parse_args()
+
+    with engine.begin() as connection:
+        found = conflicts(connection)
+        print(f"{len(found)} emails with more than one account")
+        for email, emails in found:
+            print(f"{email}: {', '.join(emails)}")
+        if found and args.command == "merge":
+            print(f"Merged {merge(connection)} accounts; removed rows are in users_merged")
@@ -0,0 +1,104 @@
+import argparse
+import gzip
+import os
+import stat
+from mimetypes import guess_type
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+from app.middleware.compression import accepted_encodings
+
+try:
+    import brotli
+except ImportError:  # without brotli only .gz variants are built
+    brotli = None
+
+
+# Preferred first
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE_SUFFIXES = (".css", ".js", ".json", ".html", ".svg", ".txt", ".xml", ".map")
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """Serves file.br / file.gz built by `python -m app.static_files` when the client accepts them."""
+
+    def __init__(self, *args, max_age: int = 86400, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = f"public, max-age={max_age}"
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        request_headers = Headers(scope=scope)
+        if path and not path.endswith("/"):
+            accepted = accepted_encodings(request_headers)
+            for encoding, suffix in PRECOMPRESSED:
+                if encoding not in accepted:
+                    continue
+                full_path, stat_result = await anyio.to_thread.run_sync(
+                    self.lookup_path, path + suffix
+                )
+                if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+                    continue
+
+                response = FileResponse(
+                    full_path,
+                    stat_result=stat_result,
+                    media_type=guess_type(path)[0] or "text/plain",
+                    headers={
+                        "Content-Encoding": encoding,
+                        "Vary": "Accept-Encoding",
+                        "Cache-Control": self.cache_control,
+                    },
+                )
+                if self.is_not_modified(response.headers, request_headers):
+                    return NotModifiedResponse(response.headers)
+                return response
+
+        response = await super().get_response(path, scope)
+        if response.status_code < 400:
+            response.headers.setdefault("Cache-Control", self.cache_control)
+            response.headers.setdefault("Vary", "Accept-Encoding")
+        return response
+
+
+# Build step ------------------
+
+
+def precompress(directory: str, minimum_size: int = 256) -> int:
+    written = 0
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            if not filename.endswith(COMPRESSIBLE_SUFFIXES):
+                continue
+            source = os.path.join(root, filename)
+            with open(source, "rb") as f:
+                data = f.read()
+            if len(data) < minimum_size:
+                continue
+
+            variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants[".br"] = brotli.compress(data, quality=11)
+
+            for suffix, compressed in variants.items():
+                # Only worth keeping when it actually saves bytes
+                if len(compressed) >= len(data):
+                    continue
+                with open(source + suffix, "wb") as f:
+                    f.write(compressed)
+                os.utime(source + suffix, (os.path.getatime(source), os.path.getmtime(source)))
+                written += 1
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-compress static assets")
+    parser.add_argument("directory", nargs="?", default="static")
+    parser.add_argument("--minimum-size", type=int, default=256)
+    args = parser.parse_args()
+    count = precompress(args.directory, args.minimum_size)
+    print(f"Wrote {count} compressed files in {args.directory}")
@@ -1,7 +1,5 @@
 from passlib.context import CryptContext
 
-from passlib.context import CryptContext
-
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -12,3 +10,7 @@ def get_password_hash(password: str):
 
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
@@ -0,0 +1,58 @@
+import logging
+import uuid
+from time import perf_counter
+
+from app import models, queries
+from app.config import settings
+from app.database import SessionLocal, engine, replica_engine
+
+
+logger = logging.getLogger(__name__)
+
+
+def fill_pool(connections: int):
+    # Check out several connections at once so the pool really opens them
+    for pool_engine in {engine, replica_engine}:
+        pool_size = getattr(pool_engine.pool, "size", lambda: connections)()
+        opened = [pool_engine.connect() for _ in range(min(connections, pool_size))]
+        try:
+            for connection in opened:
+                connection.exec_driver_sql("SELECT 1")
+        finally:
+            for connection in opened:
+                connection.close()
+
+
+def compile_hot_queries():
+    # Fills SQLAlchemy's compiled statement cache for the per-request lookups
+    db = SessionLocal()
+    try:
+        queries.user_by_id(db, uuid.UUID(int=0))
+        queries.user_by_email(db, "")
+        queries.email_exists(db, "")
+        db.query(models.Task).filter(models.Task.owner_id == "").all()
+        db.query(models.Task).filter(models.Task.id == uuid.UUID(int=0)).first()
+    finally:
+        db.close()
+
+
+def create_clients():
+    from app.routers.face_match import get_rekognition
+
+    get_rekognition()
+
+
+def warm_up():
+    """Runs in the lifespan hook, before the app reports ready."""
+    for step, args in (
+        (fill_pool, (settings.warmup_pool_connections,)),
+        (compile_hot_queries, ()),
+        (create_clients, ()),
+    ):
+        started = perf_counter()
+        try:
+            step(*args)
+            logger.info("Warm-up %s took %.1fms", step.__name__, (perf_counter() - started) * 1000)
+        except Exception as e:
+            # A cold start is slower, not broken
+            logger.warning("Warm-up %s failed: %s", step.__name__, e)
@@ -0,0 +1,93 @@
+"""Per-call cost of the hot user lookups: ORM Query API vs cached lambda statements.
+
+    python -m benchmarks.auth_queries --calls 20000
+"""
+import argparse
+import time
+import uuid
+
+from benchmarks.common import setup_env
+
+setup_env()
+
+from sqlalchemy import create_engine, func  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import models, queries  # noqa: E402
+
+
+TARGET_RPS = 5000
+
+
+def seed(session, users: int) -> list[models.User]:
+    rows = [
+        models.User(id=uuid.uuid4(), email=f"user{i}@bench.daytask", name=f"User {i}")
+        for i in range(users)
+    ]
+    session.add_all(rows)
+    session.commit()
+    return rows
+
+
+def measure(name: str, lookup, calls: int):
+    started = time.perf_counter()
+    for i in range(calls):
+        lookup(i)
+    per_call_us = (time.perf_counter() - started) / calls * 1_000_000
+    cpu_share = per_call_us * TARGET_RPS / 1_000_000
+    print(f"{name:<28} {per_call_us:>8.1f}us/call  {cpu_share:>6.1%} of a core at {TARGET_RPS} req/s")
+    return per_call_us
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--database-url", default="sqlite://")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    models.Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    users = seed(session, args.users)
+    ids = [user.id for user in users]
+    emails = [user.email for user in users]
+    session.expunge_all()
+
+    def fresh(lookup):
+        # New identity map each call, like a request-scoped session
+        def run(i):
+            lookup(i)
+            session.expunge_all()
+
+        return run
+
+    query_by_id = measure(
+        "Query API user by id",
+        fresh(lambda i: session.query(models.User).filter(models.User.id == ids[i % len(ids)]).first()),
+        args.calls,
+    )
+    lambda_by_id = measure(
+        "lambda_stmt user by id",
+        fresh(lambda i: queries.user_by_id(session, ids[i % len(ids)])),
+        args.calls,
+    )
+    query_by_email = measure(
+        "Query API user by email",
+        fresh(
+            lambda i: session.query(models.User)
+            .filter(func.lower(models.User.email) == emails[i % len(emails)])
+            .first()
+        ),
+        args.calls,
+    )
+    lambda_by_email = measure(
+        "lambda_stmt user by email",
+        fresh(lambda i: queries.user_by_email(session, emails[i % len(emails)])),
+        args.calls,
+    )
+    print(f"\nby id saves {query_by_id - lambda_by_id:.1f}us/call, by email {query_by_email - lambda_by_email:.1f}us/call")
+
+
+if __name__ == "__main__":
+    main()
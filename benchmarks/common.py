@@ -0,0 +1,51 @@
+import os
+import statistics
+
+
+# Settings the app needs at import time; real values from .env still win
+DEFAULT_ENV = {
+    "DATABASE_URL": "sqlite:///./bench.db",
+    "SECRET_KEY": "bench-secret",
+    "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRES_DAYS": "1",
+    "SMTP_PASSWORD": "bench",
+    "GOOGLE_CLIENT_ID": "bench-client",
+    "GOOGLE_CLIENT_SECRET": "bench-secret",
+    "GOOGLE_REDIRECT_URI": "http://localhost/callback",
+    # Load tests come from one address and would trip the limits at once
+    "RATE_LIMIT_ENABLED": "false",
+}
+
+
+def setup_env():
+    for key, value in DEFAULT_ENV.items():
+        os.environ.setdefault(key, value)
+    # app.main mounts ./static at import time
+    os.makedirs("static", exist_ok=True)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(name: str, samples: list[float], elapsed: float) -> dict:
+    return {
+        "name": name,
+        "count": len(samples),
+        "throughput": len(samples) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000 if samples else 0.0,
+        "p95_ms": percentile(samples, 95) * 1000 if samples else 0.0,
+        "p99_ms": percentile(samples, 99) * 1000 if samples else 0.0,
+    }
+
+
+def print_result(result: dict):
+    print(
+        f"{result['name']:<32} n={result['count']:<8} "
+        f"{result['throughput']:>10.1f}/s  "
+        f"p50={result['p50_ms']:.3f}ms p95={result['p95_ms']:.3f}ms "
+        f"p99={result['p99_ms']:.3f}ms"
+    )
@@ -0,0 +1,49 @@
+"""Memory footprint and false-positive rate of the registered-email bloom filter.
+
+    python -m benchmarks.email_filter --emails 10000000 --probes 1000000
+"""
+import argparse
+import time
+
+from benchmarks.common import setup_env
+
+setup_env()
+
+from app.config import settings  # noqa: E402
+from app.services.email_filter import BloomFilter  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--emails", type=int, default=10_000_000)
+    parser.add_argument("--probes", type=int, default=1_000_000)
+    parser.add_argument("--error-rate", type=float, default=settings.email_filter_error_rate)
+    args = parser.parse_args()
+
+    bloom = BloomFilter(args.emails, args.error_rate)
+    print(
+        f"{args.emails} emails: {bloom.size} bits, {bloom.hash_count} hashes, "
+        f"{len(bloom.bits) / 1024 / 1024:.1f} MiB"
+    )
+
+    started = time.perf_counter()
+    for i in range(args.emails):
+        bloom.add(f"user{i}@example.com")
+    elapsed = time.perf_counter() - started
+    print(f"add      {elapsed / args.emails * 1_000_000:.2f}us/email ({elapsed:.1f}s total)")
+
+    started = time.perf_counter()
+    false_positives = sum(f"new{i}@example.com" in bloom for i in range(args.probes))
+    elapsed = time.perf_counter() - started
+    print(f"lookup   {elapsed / args.probes * 1_000_000:.2f}us/email")
+    print(
+        f"false positives {false_positives}/{args.probes} "
+        f"= {false_positives / args.probes:.4%} (target {args.error_rate:.2%})"
+    )
+
+    missing = sum(f"user{i}@example.com" not in bloom for i in range(0, args.emails, 97))
+    print(f"false negatives {missing} (must be 0)")
+
+
+if __name__ == "__main__":
+    main()
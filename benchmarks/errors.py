@@ -0,0 +1,115 @@
+"""Throughput of 4xx responses, end to end and per handler.
+
+    python -m benchmarks.errors --requests 5000
+
+The malformed-flood case posts a task whose team_members holds thousands of
+non-strings, so validation reports one error per item. The handler section
+compares the old validation handler (every error rendered, JSONResponse)
+with app.errors on the same exception.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from benchmarks.common import setup_env
+
+setup_env()
+
+from fastapi.exceptions import RequestValidationError  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app import errors, models  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+async def old_validation_handler(request, exc: RequestValidationError):
+    # What app.main used to register
+    errors_ = []
+    for error in exc.errors():
+        field_path = " → ".join(str(loc) for loc in error["loc"])
+        errors_.append({"field": field_path, "message": error["msg"]})
+    return JSONResponse(status_code=422, content={"success": False, "errors": errors_})
+
+
+async def token(client: httpx.AsyncClient) -> str:
+    credentials = {"email": "errors-bench@example.com", "password": "pw"}
+    await client.post("/register", json={**credentials, "name": "Bench"})
+    response = await client.post("/login", json=credentials)
+    return response.json()["access_token"]
+
+
+async def measure(client: httpx.AsyncClient, name: str, requests: int, **request):
+    response = await client.request(**request)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await client.request(**request)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{name:<24} {response.status_code}  {requests / elapsed:>8.0f}/s  "
+        f"{len(response.content):>8} bytes/response"
+    )
+
+
+async def end_to_end(requests: int, flood_items: int):
+    models.Base.metadata.create_all(engine)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        auth = {"Authorization": f"Bearer {await token(client)}"}
+        flood = {
+            "title": "t",
+            "details": "d",
+            "date": "d",
+            "time": "t",
+            "team_members": list(range(flood_items)),
+        }
+        await measure(client, "404 unknown route", requests, method="GET", url="/nope")
+        await measure(
+            client, "401 bad token", requests,
+            method="GET", url="/tasks/", headers={"Authorization": "Bearer x"},
+        )
+        await measure(
+            client, "422 login", requests, method="POST", url="/login", json={"email": "bad"}
+        )
+        await measure(
+            client, "422 malformed flood", max(1, requests // 10),
+            method="POST", url="/tasks/", json=flood, headers=auth,
+        )
+
+
+async def handlers(requests: int, flood_items: int):
+    exc = RequestValidationError(
+        [
+            {"type": "string_type", "loc": ("body", "team_members", i),
+             "msg": "Input should be a valid string", "input": i}
+            for i in range(flood_items)
+        ]
+    )
+    for name, handler in (
+        ("old handler", old_validation_handler),
+        ("app.errors handler", errors.validation_exception_handler),
+    ):
+        response = await handler(None, exc)
+        started = time.perf_counter()
+        for _ in range(requests):
+            await handler(None, exc)
+        elapsed = time.perf_counter() - started
+        print(
+            f"{name:<24} 422  {requests / elapsed:>8.0f}/s  "
+            f"{len(response.body):>8} bytes/response"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--flood-items", type=int, default=2_000)
+    args = parser.parse_args()
+    asyncio.run(end_to_end(args.requests, args.flood_items))
+    asyncio.run(handlers(args.requests, args.flood_items))
+
+
+if __name__ == "__main__":
+    main()
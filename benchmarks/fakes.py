@@ -0,0 +1,44 @@
+"""Stand-ins for SMTP, Google OAuth and Rekognition so benchmarks stay offline."""
+import smtplib
+import time
+
+import httpx
+
+
+class FakeSMTP:
+    latency = 0.02
+
+    def __init__(self, host: str, port: int):
+        time.sleep(self.latency)
+
+    def starttls(self):
+        pass
+
+    def login(self, user: str, password: str):
+        pass
+
+    def sendmail(self, sender: str, receiver: str, message: str):
+        time.sleep(self.latency)
+
+    def quit(self):
+        pass
+
+
+class FakeRekognition:
+    latency = 0.15
+
+    def compare_faces(self, SourceImage, TargetImage, SimilarityThreshold):
+        time.sleep(self.latency)
+        return {"FaceMatches": [{"Similarity": 99.2}]}
+
+
+def install():
+    from app.routers import face_match
+    from app.services.google_oauth import google_oauth
+    from benchmarks.mock_google import MockGoogle
+
+    smtplib.SMTP = FakeSMTP  # type: ignore
+    face_match.rekognition = FakeRekognition()
+    google_oauth.client = httpx.AsyncClient(
+        transport=httpx.MockTransport(MockGoogle().handler)
+    )
@@ -0,0 +1,87 @@
+"""Google sign-in latency: per-request clients + userinfo vs pooled client + local ID-token check.
+
+    python -m benchmarks.google_auth_latency --latency 0.03 --logins 200
+"""
+import argparse
+import asyncio
+import socket
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from benchmarks.common import print_result, setup_env, summarize
+
+setup_env()
+
+from app.config import settings  # noqa: E402
+from app.services.google_oauth import GoogleOAuth  # noqa: E402
+from benchmarks.mock_google import MockGoogle  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(mock: MockGoogle) -> str:
+    port = free_port()
+    config = uvicorn.Config(mock.asgi_app(), host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+async def per_request_clients(code: str) -> str:
+    # What /google_auth used to do: two fresh clients and a userinfo call
+    async with httpx.AsyncClient() as client:
+        token_response = await client.post(settings.google_token_url, data={"code": code})
+        token_response.raise_for_status()
+    access_token = token_response.json()["access_token"]
+    async with httpx.AsyncClient() as client:
+        user_response = await client.get(
+            settings.google_userinfo_url, headers={"Authorization": f"Bearer {access_token}"}
+        )
+        user_response.raise_for_status()
+    return user_response.json()["email"]
+
+
+async def measure(name: str, login, logins: int) -> dict:
+    samples = []
+    started = time.perf_counter()
+    for _ in range(logins):
+        call_started = time.perf_counter()
+        await login()
+        samples.append(time.perf_counter() - call_started)
+    return summarize(name, samples, time.perf_counter() - started)
+
+
+async def run(logins: int):
+    oauth = GoogleOAuth()
+    await oauth.startup()
+    try:
+        print_result(await measure("per-request clients", lambda: per_request_clients("c"), logins))
+        print_result(await measure("pooled + local verify", lambda: oauth.authenticate("c"), logins))
+    finally:
+        await oauth.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.03, help="seconds per mock call")
+    parser.add_argument("--logins", type=int, default=200)
+    args = parser.parse_args()
+
+    base_url = start_server(MockGoogle(latency=args.latency))
+    settings.google_token_url = f"{base_url}/token"
+    settings.google_jwks_url = f"{base_url}/certs"
+    settings.google_userinfo_url = f"{base_url}/userinfo"
+    asyncio.run(run(args.logins))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Import-time profile of app.main from `python -X importtime`.
+
+    python -m benchmarks.import_time --top 25
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+from benchmarks.common import DEFAULT_ENV, setup_env
+
+
+def profile(module: str) -> list[tuple[int, int, str]]:
+    setup_env()
+    env = {**DEFAULT_ENV, **os.environ}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if result.returncode != 0:
+        raise SystemExit(result.stderr)
+
+    # "import time: self [us] | cumulative | imported package"
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.rstrip()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    rows = profile(args.module)
+    # Top-level imports (no indentation) add up to the total
+    total = sum(cumulative for _, cumulative, name in rows if not name.startswith("  "))
+    print(f"import {args.module}: {total / 1000:.1f}ms across {len(rows)} modules\n")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for self_us, cumulative_us, name in sorted(rows, key=lambda r: r[1], reverse=True)[: args.top]:
+        print(f"{cumulative_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms  {name.strip()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Throughput of the background job runner against the configured database.
+
+    python -m benchmarks.jobs --jobs 5000
+    DATABASE_URL=postgresql://... python -m benchmarks.jobs --workers 32
+
+Enqueues jobs in batches (one transaction per batch, like request handlers
+committing), then times the runner until every job has finished.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import setup_env
+
+setup_env()
+
+from sqlalchemy import delete, func, select  # noqa: E402
+
+from app import jobs, models  # noqa: E402
+from app.database import SessionLocal, engine  # noqa: E402
+
+
+ENQUEUE_BATCH_SIZE = 100
+
+
+@jobs.job_runner.register("bench_noop", max_attempts=1, concurrency=1_000)
+def noop(payload: dict):
+    return payload["i"]
+
+
+@jobs.job_runner.register("bench_io", max_attempts=1, concurrency=1_000)
+async def io_bound(payload: dict):
+    # Stands in for an SMTP or API call
+    await asyncio.sleep(payload["latency"])
+
+
+def enqueue(name: str, count: int, payload: dict) -> float:
+    started = time.perf_counter()
+    for offset in range(0, count, ENQUEUE_BATCH_SIZE):
+        with SessionLocal() as db:
+            for i in range(offset, min(offset + ENQUEUE_BATCH_SIZE, count)):
+                jobs.enqueue(db, name, {**payload, "i": i})
+            db.commit()
+    return count / (time.perf_counter() - started)
+
+
+def finished(name: str) -> int:
+    with SessionLocal() as db:
+        return db.scalar(
+            select(func.count())
+            .select_from(models.Job)
+            .where(models.Job.name == name, models.Job.status == jobs.SUCCEEDED)
+        )
+
+
+async def drain(name: str, count: int) -> float:
+    started = time.perf_counter()
+    await jobs.job_runner.startup()
+    try:
+        while finished(name) < count:
+            await asyncio.sleep(0.05)
+    finally:
+        await jobs.job_runner.shutdown(timeout=5)
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=5_000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(engine)
+    jobs.job_runner.workers = args.workers
+    # Only the benchmark's own job types
+    jobs.job_runner.types = {
+        name: job_type
+        for name, job_type in jobs.job_runner.types.items()
+        if name.startswith("bench_")
+    }
+
+    try:
+        for name, payload in (("bench_noop", {}), ("bench_io", {"latency": args.latency})):
+            enqueue_rate = enqueue(name, args.jobs, payload)
+            run_rate = asyncio.run(drain(name, args.jobs))
+            print(
+                f"{name:<12} workers={args.workers:<4} enqueue {enqueue_rate:>8.0f}/s  "
+                f"run {run_rate:>8.0f}/s"
+            )
+    finally:
+        with SessionLocal() as db:
+            db.execute(delete(models.Job).where(models.Job.name.like("bench_%")))
+            db.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Per-request cost of MetricsMiddleware against a bare ASGI app.
+
+    python -m benchmarks.metrics_overhead --requests 200000
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import setup_env
+
+setup_env()
+
+from app.metrics import registry  # noqa: E402
+from app.middleware.metrics import MetricsMiddleware  # noqa: E402
+
+
+class FakeRoute:
+    path = "/tasks/"
+
+
+async def bare_app(scope, receive, send):
+    scope["route"] = FakeRoute
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"[]"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def time_app(app, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        await app({"type": "http", "method": "GET", "path": "/tasks/"}, receive, send)
+    return time.perf_counter() - started
+
+
+async def run(requests: int):
+    baseline = await time_app(bare_app, requests)
+    instrumented = await time_app(MetricsMiddleware(bare_app), requests)
+    overhead_us = (instrumented - baseline) / requests * 1_000_000
+    print(f"baseline      {baseline / requests * 1_000_000:.2f}us/request")
+    print(f"instrumented  {instrumented / requests * 1_000_000:.2f}us/request")
+    print(f"overhead      {overhead_us:.2f}us/request")
+    render_started = time.perf_counter()
+    registry.render()
+    print(f"/metrics render {(time.perf_counter() - render_started) * 1000:.3f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
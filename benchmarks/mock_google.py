@@ -0,0 +1,96 @@
+"""Mock Google OAuth endpoints: code exchange, signing keys and userinfo.
+
+Used in-process through httpx.MockTransport by the fakes, or as a real
+HTTP server (with simulated latency) by benchmarks.google_auth_latency.
+"""
+import asyncio
+import time
+import uuid
+
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.config import settings
+
+
+class MockGoogle:
+    def __init__(self, email: str = "google.user@bench.daytask", latency: float = 0.0):
+        self.email = email
+        self.latency = latency
+        self.kid = uuid.uuid4().hex
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.private_pem = private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        public_pem = private_key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        )
+        self.public_jwk = {
+            **jwk.construct(public_pem, "RS256").to_dict(),
+            "kid": self.kid,
+            "use": "sig",
+        }
+
+    def token_response(self) -> dict:
+        now = int(time.time())
+        claims = {
+            "iss": "https://accounts.google.com",
+            "aud": settings.google_client_id,
+            "sub": uuid.uuid5(uuid.NAMESPACE_URL, self.email).hex,
+            "email": self.email,
+            "email_verified": True,
+            "name": "Google User",
+            "iat": now,
+            "exp": now + 3600,
+        }
+        id_token = jwt.encode(
+            claims, self.private_pem.decode(), algorithm="RS256", headers={"kid": self.kid}
+        )
+        return {"access_token": "fake-google-token", "id_token": id_token, "expires_in": 3599}
+
+    def jwks_response(self) -> dict:
+        return {"keys": [self.public_jwk]}
+
+    def userinfo_response(self) -> dict:
+        return {"email": self.email, "name": "Google User", "verified_email": True}
+
+    # In-process, for httpx.MockTransport
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/token"):
+            return httpx.Response(200, json=self.token_response())
+        if request.url.path.endswith("/certs"):
+            return httpx.Response(
+                200, json=self.jwks_response(), headers={"Cache-Control": "max-age=3600"}
+            )
+        return httpx.Response(200, json=self.userinfo_response())
+
+    # Real server, for latency tests
+    def asgi_app(self) -> Starlette:
+        async def token(request: Request):
+            await asyncio.sleep(self.latency)
+            return JSONResponse(self.token_response())
+
+        async def certs(request: Request):
+            await asyncio.sleep(self.latency)
+            return JSONResponse(self.jwks_response(), headers={"Cache-Control": "max-age=3600"})
+
+        async def userinfo(request: Request):
+            await asyncio.sleep(self.latency)
+            return JSONResponse(self.userinfo_response())
+
+        return Starlette(
+            routes=[
+                Route("/token", token, methods=["POST"]),
+                Route("/certs", certs),
+                Route("/userinfo", userinfo),
+            ]
+        )
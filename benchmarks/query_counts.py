@@ -0,0 +1,79 @@
+"""Statements per request for the hot endpoints, checked against a budget.
+
+    python -m benchmarks.query_counts
+    python -m benchmarks.query_counts --tasks 200
+
+Every request runs with a cold user cache, so the count includes loading
+the current user. Exits non-zero when an endpoint goes over its budget,
+e.g. after a change that lazy-loads per row.
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+import httpx
+
+from benchmarks.common import setup_env
+
+os.environ.setdefault("QUERY_INSPECTOR_ENABLED", "true")
+setup_env()
+
+from app import models, oauth2  # noqa: E402
+from app.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.query_inspector import query_inspector  # noqa: E402
+
+
+# (method, path) -> most statements the request may issue
+BUDGETS = {
+    ("GET", "/tasks/"): 2,
+    ("GET", "/tasks/archived"): 2,
+    ("GET", "/tasks/stats"): 3,
+    ("GET", "/user"): 1,
+}
+
+TASK_BODY = {
+    "title": "Counted task",
+    "details": "Created by benchmarks.query_counts",
+    "team_members": ["a@example.com", "b@example.com"],
+    "date": "2025-01-01",
+    "time": "10:00",
+}
+
+
+async def run(tasks: int) -> bool:
+    models.Base.metadata.create_all(engine)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        credentials = {"email": "query-counts@example.com", "password": "pw"}
+        await client.post("/register", json={**credentials, "name": "Bench"})
+        response = await client.post("/login", json=credentials)
+        auth = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        for _ in range(tasks):
+            await client.post("/tasks/", json=TASK_BODY, headers=auth)
+
+        ok = True
+        for (method, path), budget in BUDGETS.items():
+            oauth2.user_cache.clear()
+            with query_inspector.capture() as queries:
+                response = await client.request(method, path, headers=auth)
+            verdict = "ok" if queries.count <= budget else "OVER BUDGET"
+            print(f"{method} {path:<20} {response.status_code}  {queries.count} queries (budget {budget})  {verdict}")
+            if queries.count > budget:
+                ok = False
+                for statement, _, _ in queries.statements:
+                    print(f"    {' '.join(statement.split())[:120]}")
+        return ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=50)
+    args = parser.parse_args()
+    if not asyncio.run(run(args.tasks)):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Bulk-loads users and tasks for benchmarks.
+
+    python -m benchmarks.seed --users 100000 --tasks 10000000
+"""
+import argparse
+import random
+import time
+import uuid
+
+from sqlalchemy import func, insert, select
+
+from benchmarks.common import setup_env
+
+setup_env()
+
+from app import models, utils  # noqa: E402
+from app.database import engine  # noqa: E402
+
+
+BATCH_SIZE = 10_000
+PASSWORD = "bench-password"
+
+
+def user_email(i: int) -> str:
+    return f"user{i}@bench.daytask"
+
+
+def seed(users: int, tasks: int) -> int:
+    models.Base.metadata.create_all(engine)
+
+    with engine.connect() as connection:
+        existing = connection.execute(select(func.count()).select_from(models.User)).scalar()
+        if existing:
+            print(f"Database already seeded with {existing} users")
+            return existing
+
+    # One hash for everyone, bcrypt per row would dominate seeding time
+    password_hash = utils.get_password_hash(PASSWORD)
+    user_ids = [uuid.uuid4() for _ in range(users)]
+
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        for offset in range(0, users, BATCH_SIZE):
+            connection.execute(
+                insert(models.User),
+                [
+                    {
+                        "id": user_ids[i],
+                        "email": user_email(i),
+                        "password": password_hash,
+                        "name": f"Bench User {i}",
+                        "user_type": "email",
+                    }
+                    for i in range(offset, min(offset + BATCH_SIZE, users))
+                ],
+            )
+    print(f"Seeded {users} users in {time.perf_counter() - started:.1f}s")
+
+    owners = [str(user_id) for user_id in user_ids]
+    started = time.perf_counter()
+    with engine.begin() as connection:
+        for offset in range(0, tasks, BATCH_SIZE):
+            connection.execute(
+                insert(models.Task),
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "owner_id": random.choice(owners),
+                        "title": f"Task {i}",
+                        "details": "Seeded by benchmarks.seed",
+                        "team_members": random.sample(owners, k=min(2, len(owners))),
+                        "time": "10:00",
+                        "date": "2025-01-01",
+                        "is_completed": i % 3 == 0,
+                    }
+                    for i in range(offset, min(offset + BATCH_SIZE, tasks))
+                ],
+            )
+    print(f"Seeded {tasks} tasks in {time.perf_counter() - started:.1f}s")
+    return users
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--tasks", type=int, default=10_000_000)
+    args = parser.parse_args()
+    seed(args.users, args.tasks)
+
+
+if __name__ == "__main__":
+    main()
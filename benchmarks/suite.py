@@ -0,0 +1,220 @@
+"""Load test for every router, run in-process against the seeded database.
+
+    python -m benchmarks.suite --users 100000 --tasks 10000000 --concurrency 50
+    python -m benchmarks.suite --compare benchmarks/results/<commit>.json
+    python -m benchmarks.import_time
+
+Results are written to benchmarks/results/<commit>.json so runs on
+different commits can be compared.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+
+from benchmarks.common import print_result, setup_env, summarize
+
+setup_env()
+
+from benchmarks import fakes  # noqa: E402
+from benchmarks.seed import PASSWORD, seed, user_email  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+REGRESSION_THRESHOLD = 0.10
+
+TASK_BODY = {
+    "title": "Benchmark task",
+    "details": "Created by benchmarks.suite",
+    "team_members": [],
+    "date": "2025-01-01",
+    "time": "10:00",
+}
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, index: int):
+        self.client = client
+        self.email = user_email(index)
+        self.headers: dict[str, str] = {}
+        self.task_ids: list[str] = []
+
+    async def login(self) -> httpx.Response:
+        response = await self.client.post(
+            "/login", json={"email": self.email, "password": PASSWORD}
+        )
+        if response.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return response
+
+    async def register(self) -> httpx.Response:
+        return await self.client.post(
+            "/register",
+            json={
+                "email": f"new-{uuid.uuid4().hex}@bench.daytask",
+                "password": PASSWORD,
+                "name": "New User",
+            },
+        )
+
+    async def create_task(self) -> httpx.Response:
+        response = await self.client.post("/tasks/", json=TASK_BODY, headers=self.headers)
+        if response.status_code == 201:
+            self.task_ids.append(response.json()["id"])
+        return response
+
+    async def list_tasks(self) -> httpx.Response:
+        return await self.client.get("/tasks/", headers=self.headers)
+
+    async def update_task(self) -> httpx.Response:
+        if not self.task_ids:
+            await self.create_task()
+        task_id = self.task_ids[-1]
+        return await self.client.put(
+            f"/tasks/{task_id}/", json={**TASK_BODY, "title": "Updated"}, headers=self.headers
+        )
+
+    async def delete_task(self) -> httpx.Response:
+        if not self.task_ids:
+            await self.create_task()
+        return await self.client.delete(f"/tasks/{self.task_ids.pop()}/", headers=self.headers)
+
+    async def list_users(self) -> httpx.Response:
+        return await self.client.get("/users", params={"limit": 50}, headers=self.headers)
+
+    async def match_face(self) -> httpx.Response:
+        files = {
+            "source": ("source.jpg", b"\xff\xd8source", "image/jpeg"),
+            "target": ("target.jpg", b"\xff\xd8target", "image/jpeg"),
+        }
+        return await self.client.post("/match-face", files=files)
+
+    async def send_otp(self) -> httpx.Response:
+        return await self.client.post("/send_otp", json={"email": self.email})
+
+    async def google_auth(self) -> httpx.Response:
+        return await self.client.post("/google_auth", json={"code": "fake-code"})
+
+
+# Run in this order: later scenarios rely on the login token and created tasks
+SCENARIOS = (
+    "login",
+    "register",
+    "create_task",
+    "list_tasks",
+    "update_task",
+    "delete_task",
+    "list_users",
+    "match_face",
+    "send_otp",
+    "google_auth",
+)
+
+
+async def run_scenario(name: str, users: list[VirtualUser], iterations: int) -> dict:
+    samples: list[float] = []
+    errors = 0
+
+    async def worker(user: VirtualUser):
+        nonlocal errors
+        action = getattr(user, name)
+        for _ in range(iterations):
+            started = time.perf_counter()
+            response = await action()
+            samples.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(user) for user in users))
+    result = summarize(name, samples, time.perf_counter() - started)
+    result["errors"] = errors
+    return result
+
+
+async def run(concurrency: int, iterations: int, seeded_users: int) -> list[dict]:
+    transport = httpx.ASGITransport(app=app)
+    # ASGITransport doesn't send lifespan events, so run startup/warm-up here
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            users = [VirtualUser(client, i % seeded_users) for i in range(concurrency)]
+            results = []
+            for name in SCENARIOS:
+                result = await run_scenario(name, users, iterations)
+                print_result(result)
+                results.append(result)
+            return results
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def save_results(results: list[dict], config: dict) -> str:
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    commit = current_commit()
+    path = os.path.join(RESULTS_DIR, f"{commit}.json")
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "commit": commit,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "config": config,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    return path
+
+
+def compare(results: list[dict], baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+
+    print(f"\nCompared with {baseline_path}")
+    for result in results:
+        before = baseline.get(result["name"])
+        if before is None or not before["p95_ms"]:
+            continue
+        change = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"]
+        flag = "  REGRESSION" if change > REGRESSION_THRESHOLD else ""
+        print(
+            f"{result['name']:<32} p95 {before['p95_ms']:.2f}ms -> "
+            f"{result['p95_ms']:.2f}ms ({change:+.1%}){flag}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--tasks", type=int, default=10_000_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--compare", help="results file of an earlier run")
+    args = parser.parse_args()
+
+    fakes.install()
+    seeded_users = seed(args.users, args.tasks)
+    results = asyncio.run(run(args.concurrency, args.iterations, seeded_users))
+
+    path = save_results(results, vars(args))
+    print(f"\nSaved results to {path}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Fan-out of task events from the in-process hub to connected clients.
+
+    python -m benchmarks.task_fanout --clients 10000 --events 20
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import print_result, setup_env, summarize
+
+setup_env()
+
+from app.services.task_events import LocalBroker, TaskEventHub  # noqa: E402
+
+
+async def run(clients: int, events: int):
+    hub = TaskEventHub(LocalBroker())
+    latencies: list[float] = []
+    received = 0
+    done = asyncio.Event()
+
+    async def client(subscription):
+        nonlocal received
+        while True:
+            event = await subscription.queue.get()
+            latencies.append(time.perf_counter() - event["task"]["sent_at"])
+            received += 1
+            if received == clients * events:
+                done.set()
+
+    # Every client is on the same team, so each event reaches all of them
+    subscriptions = [hub.subscribe([f"user-{i}", "team"]) for i in range(clients)]
+    consumers = [asyncio.create_task(client(s)) for s in subscriptions]
+
+    started = time.perf_counter()
+    for _ in range(events):
+        hub.dispatch(
+            {
+                "type": "task.updated",
+                "audience": ["team"],
+                "task": {"sent_at": time.perf_counter()},
+            }
+        )
+        await asyncio.sleep(0)
+    await done.wait()
+    elapsed = time.perf_counter() - started
+
+    for consumer in consumers:
+        consumer.cancel()
+    for subscription in subscriptions:
+        hub.unsubscribe(subscription)
+
+    return summarize(f"fanout {clients} clients", latencies, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=10_000)
+    parser.add_argument("--events", type=int, default=20)
+    args = parser.parse_args()
+    print_result(asyncio.run(run(args.clients, args.events)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Throughput and memory of streamed task export/import.
+
+    python -m benchmarks.task_transfer --rows 1000000
+    python -m benchmarks.task_transfer --database-url postgresql://... --format csv
+
+Exports one owner's tasks to a temp file, then imports the file back in
+64KB chunks the way /tasks/import receives an upload.
+"""
+import argparse
+import os
+import resource
+import tempfile
+import time
+import uuid
+
+from benchmarks.common import setup_env
+
+setup_env()
+
+from sqlalchemy import create_engine, delete, insert  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import models  # noqa: E402
+from app.services import task_transfer  # noqa: E402
+
+
+SEED_BATCH_SIZE = 10_000
+CHUNK_SIZE = 64 * 1024
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss is KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(engine, owner_id: str, rows: int):
+    with engine.begin() as connection:
+        for offset in range(0, rows, SEED_BATCH_SIZE):
+            connection.execute(
+                insert(models.Task),
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "owner_id": owner_id,
+                        "title": f"Task {i}",
+                        "details": "Seeded by benchmarks.task_transfer",
+                        "team_members": [],
+                        "time": "10:00",
+                        "date": f"2025-01-{i % 28 + 1:02d}",
+                        "is_completed": i % 3 == 0,
+                    }
+                    for i in range(offset, min(offset + SEED_BATCH_SIZE, rows))
+                ],
+            )
+
+
+def read_chunks(path: str):
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--database-url", default="sqlite:///./bench_transfer.db")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    models.Base.metadata.create_all(engine)
+    source, target = str(uuid.uuid4()), str(uuid.uuid4())
+
+    started = time.perf_counter()
+    seed(engine, source, args.rows)
+    print(f"Seeded {args.rows} tasks in {time.perf_counter() - started:.1f}s")
+    baseline = max_rss_mb()
+
+    fd, path = tempfile.mkstemp(suffix=f".{args.format}")
+    try:
+        started = time.perf_counter()
+        with os.fdopen(fd, "wb") as f:
+            for chunk in task_transfer.export_tasks(engine, source, args.format):
+                f.write(chunk)
+        elapsed = time.perf_counter() - started
+        size_mb = os.path.getsize(path) / 1024 / 1024
+        print(
+            f"export {args.format:<6} {args.rows / elapsed:>10.0f} rows/s  "
+            f"{size_mb / elapsed:>6.1f} MB/s  peak RSS +{max_rss_mb() - baseline:.0f}MB"
+        )
+
+        baseline = max_rss_mb()
+        session = sessionmaker(bind=engine)()
+        started = time.perf_counter()
+        imported = task_transfer.import_tasks(session, target, args.format, read_chunks(path))
+        elapsed = time.perf_counter() - started
+        session.close()
+        print(
+            f"import {args.format:<6} {imported / elapsed:>10.0f} rows/s  "
+            f"peak RSS +{max_rss_mb() - baseline:.0f}MB"
+        )
+    finally:
+        os.remove(path)
+        with engine.begin() as connection:
+            for owner_id in (source, target):
+                connection.execute(delete(models.Task).where(models.Task.owner_id == owner_id))
+                connection.execute(delete(models.TaskStat).where(models.TaskStat.owner_id == owner_id))
+                connection.execute(
+                    delete(models.TaskDailyStat).where(models.TaskDailyStat.owner_id == owner_id)
+                )
+
+
+if __name__ == "__main__":
+    main()